@@ -8,9 +8,13 @@ It also initializes the application's logging system to ensure consistent,
 structured, and informative logs from all modules.
 """
 
+import functools
 import logging
 import os
+import re
+import socket
 import sys
+from pathlib import Path
 from typing import Dict, Any
 
 import structlog
@@ -20,31 +24,38 @@ import structlog
 # --- File and Directory Names ---
 # Defines the standard names for files and directories used by the application.
 # This makes it easy to change a filename in one place if needed.
-DB_FILE = os.path.join(
-    os.path.dirname(__file__), "data/yugioh_decks.db"
+# The project root is resolved exactly once; every path constant derives from
+# it. The constants stay plain strings so downstream consumers
+# (sqlite3.connect, open, subprocess) are unchanged.
+_BASE = Path(__file__).resolve().parent
+
+DB_FILE = str(
+    _BASE / "data" / "yugioh_decks.db"
 )  # Default filename for the SQLite database.
-DECK_DIR = os.path.join(
-    os.path.dirname(__file__), "deck_data"
-)  # Directory where raw deck JSON files are stored.
-UPDATE_INFO_FILE = os.path.join(
-    os.path.dirname(__file__), "data/update_info.json"
+DECK_DIR = str(_BASE / "deck_data")  # Directory where raw deck JSON files are stored.
+UPDATE_INFO_FILE = str(
+    _BASE / "data" / "update_info.json"
 )  # Cache file to store update timestamps and MD5 hashes.
 
-LOCAL_CARDS_FILE = os.path.join(
-    os.path.dirname(__file__), "data/cards.json"
+LOCAL_CARDS_FILE = str(
+    _BASE / "data" / "cards.json"
 )  # Local copy of the main card data file.
-LOCAL_SETCODES_FILE = os.path.join(
-    os.path.dirname(__file__), "data/strings.conf"
+LOCAL_SETCODES_FILE = str(
+    _BASE / "data" / "strings.conf"
 )  # Local copy of the setcode definitions.
-LOCAL_CONSTANTS_FILE = os.path.join(
-    os.path.dirname(__file__), "data/constant.lua"
+LOCAL_CONSTANTS_FILE = str(
+    _BASE / "data" / "constant.lua"
 )  # Local copy of game constants (Race, Attribute, etc.).
 
-LOCAL_ALIAS_DB_FILE = os.path.join(
-    os.path.dirname(__file__), "data/cards.cdb"
+LOCAL_ALIAS_DB_FILE = str(
+    _BASE / "data" / "cards.cdb"
 )  # Local copy of the alias/alternate artwork database.
 
-SQL_DUMP_FILE = os.path.join(os.path.dirname(__file__), "data/yugioh_decks_dump.sql")
+SQL_DUMP_FILE = str(_BASE / "data" / "yugioh_decks_dump.sql")
+
+BUILD_FINGERPRINT_FILE = str(
+    _BASE / "data" / "build_fingerprint.json"
+)  # Records the input-file digests of the last successful database build.
 
 # --- Update Behavior ---
 # Controls how often the application checks for new data.
@@ -71,6 +82,16 @@ URLS: Dict[str, str] = {
 
 # --- Logging Setup ---
 
+# Hostname and PID are constant for the process lifetime; resolve them once at
+# module load instead of paying a syscall per log record.
+_STATIC_LOG_CONTEXT = {"host": socket.gethostname(), "pid": os.getpid()}
+
+
+def _add_static_context(_logger, _method_name, event_dict):
+    """Injects the cached process-constant context into every log record."""
+    event_dict.update(_STATIC_LOG_CONTEXT)
+    return event_dict
+
 
 def setup_logging():
     """
@@ -95,24 +116,36 @@ def setup_logging():
     # Step 2: Configure structlog's processor chain.
     # Processors are functions that receive the log record and can modify it.
     # They are executed in the order they are listed.
+    processors = [
+        # Drop records below the stdlib log level first, so filtered events
+        # short-circuit before the more expensive processors below run.
+        structlog.stdlib.filter_by_level,
+        # Merges context from `structlog.contextvars` into the event dict.
+        # Allows adding context to all subsequent logs within a block.
+        structlog.contextvars.merge_contextvars,
+        # Adds the logger's name (e.g., 'data_management.updater') to the record.
+        structlog.stdlib.add_logger_name,
+        # Adds the log level (e.g., 'info', 'error') to the record.
+        structlog.stdlib.add_log_level,
+        # Injects the hostname/PID cached at module load.
+        _add_static_context,
+        # Adds a timestamp to the record. `fmt="iso"` gives `YYYY-MM-DDTHH:MM:SS`.
+        # UTC avoids a localtime/timezone lookup per record.
+        structlog.processors.TimeStamper(fmt="iso", utc=True),
+    ]
+    # The final renderer: JSON for production (enabled via LOG_JSON=1, and
+    # markedly cheaper to render), colorized console output for development.
+    # JSONRenderer needs `format_exc_info` to serialize exceptions, whereas
+    # ConsoleRenderer formats them itself — keeping both would render every
+    # exception twice (and emit a deprecation warning since structlog 21.2).
+    if os.getenv("LOG_JSON") == "1":
+        processors.append(structlog.processors.format_exc_info)
+        processors.append(structlog.processors.JSONRenderer())
+    else:
+        processors.append(structlog.dev.ConsoleRenderer(colors=True))
+
     structlog.configure(
-        processors=[
-            # Merges context from `structlog.contextvars` into the event dict.
-            # Allows adding context to all subsequent logs within a block.
-            structlog.contextvars.merge_contextvars,
-            # Adds the logger's name (e.g., 'data_management.updater') to the record.
-            structlog.stdlib.add_logger_name,
-            # Adds the log level (e.g., 'info', 'error') to the record.
-            structlog.stdlib.add_log_level,
-            # Adds a timestamp to the record. `fmt="iso"` gives `YYYY-MM-DDTHH:MM:SS`.
-            structlog.processors.TimeStamper(fmt="iso"),
-            # If the log record contains exception info, this renders it into a string.
-            structlog.processors.format_exc_info,
-            # The final step: Renders the structured log record into a beautiful,
-            # colorized console output, perfect for development.
-            # For production, this could be swapped with `structlog.processors.JSONRenderer()`.
-            structlog.dev.ConsoleRenderer(colors=True),
-        ],
+        processors=processors,
         # `BoundLogger` is the standard wrapper that makes the logging API work.
         wrapper_class=structlog.stdlib.BoundLogger,
         # `LoggerFactory` creates standard `logging.Logger` instances.
@@ -125,6 +158,7 @@ def setup_logging():
 # --- Cloudflare D1 Configuration ---
 
 
+@functools.lru_cache(maxsize=1)
 def get_d1_config_from_env() -> Dict[str, str]:
     """
     Loads Cloudflare D1 configuration from environment variables.
@@ -151,6 +185,11 @@ def get_d1_config_from_env() -> Dict[str, str]:
 
     Raises:
         - SystemExit: If any of the required environment variables are not set.
+
+    Note:
+        The result is cached for the lifetime of the process (environment
+        variables are process-constant), so repeated callers do not pay for
+        the `os.getenv` lookups or the validation pass again.
     """
     log = structlog.get_logger("config.d1")
     # CHANGED: Now reads D1_DATABASE_NAME instead of D1_DATABASE_ID for robust deployment.
@@ -177,20 +216,24 @@ def get_d1_config_from_env() -> Dict[str, str]:
     return config
 
 
+# Pattern matching dictionary keys that hold sensitive values. Compiled once
+# at module load; the case-insensitive matching and the substring scan both
+# run inside the regex engine instead of a Python-level loop per key.
+_SENSITIVE_KEY_RE = re.compile(r"token|password|key|id", re.IGNORECASE)
+
+
 def mask_sensitive_data(data: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Creates a copy of a dictionary and masks sensitive values for safe logging.
+    Returns a copy of a dictionary with sensitive values masked for safe logging.
 
     This is a security utility to prevent accidental leakage of secrets like
     API tokens or passwords into log files or console output.
 
     Workflow:
-    1.  Creates a shallow copy of the input dictionary to avoid side effects.
-    2.  Defines a list of substrings that indicate a key is sensitive (e.g., 'token').
-    3.  Iterates through the copied dictionary.
-    4.  If a key's name contains one of the sensitive substrings, its value is
-        replaced with '***REDACTED***'.
-    5.  Returns the sanitized copy.
+    1.  Builds a new dictionary in a single pass over the input.
+    2.  Any string value whose key matches the sensitive-key pattern (e.g.,
+        contains 'token' or 'password') is replaced with '***REDACTED***'.
+    3.  All other entries are carried over unchanged.
 
     Args:
         - data (Dict[str, Any]): The dictionary to process.
@@ -198,12 +241,11 @@ def mask_sensitive_data(data: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         - A new dictionary (Dict[str, Any]) with sensitive values redacted.
     """
-    sensitive_keys = ["token", "password", "key", "id"]
-    # Create a shallow copy to avoid modifying the original dictionary in place.
-    safe_data = data.copy()
-    for key, value in safe_data.items():
-        # Check if any of the sensitive substrings are in the key name (case-insensitive).
-        if any(sens_key in key.lower() for sens_key in sensitive_keys):
-            if isinstance(value, str):
-                safe_data[key] = "***REDACTED***"
-    return safe_data
+    return {
+        key: (
+            "***REDACTED***"
+            if isinstance(value, str) and _SENSITIVE_KEY_RE.search(key)
+            else value
+        )
+        for key, value in data.items()
+    }
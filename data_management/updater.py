@@ -7,16 +7,22 @@ data. It uses a local cache (`update_info.json`) to avoid re-downloading
 files unnecessarily, respecting the update interval defined in the config.
 """
 
-import io
+import copy
+import hashlib
 import json
 import os
 import re
+import shutil
+import tempfile
 import time
 import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Any, Optional
 
 import requests
 import structlog
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from config import (
     URLS,
@@ -30,6 +36,84 @@ from config import (
 
 log = structlog.get_logger(__name__)
 
+# Prefer orjson (a much faster C implementation) for the cache file when it
+# is installed, falling back to the stdlib so no hard dependency is added.
+# Both variants produce/consume bytes so the cache file is handled in
+# binary mode, skipping the text-mode encoding step.
+try:
+    import orjson
+
+    def _json_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+    _json_loads = orjson.loads
+except ImportError:
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, indent=2).encode("utf-8")
+
+    _json_loads = json.loads
+
+# A single pooled session reuses TCP+TLS connections across all fetches
+# (notably the md5 -> zip pair on the same host) and retries transient
+# server errors with backoff instead of failing the whole update check.
+_SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504)),
+)
+_SESSION.mount("https://", _adapter)
+_SESSION.mount("http://", _adapter)
+
+# The remote MD5 endpoint wraps the hash in a JS callback; compiled once at
+# import, and matched against raw bytes so the ASCII response never needs a
+# UTF-8 decode.
+_MD5_CALLBACK_RE = re.compile(rb'gu\("([a-f0-9]{32})"\)')
+
+# Sentinel returned by `_fetch_url` when the server answered 304 Not Modified,
+# i.e. the locally cached copy is still current and no body was transferred.
+NOT_MODIFIED = object()
+
+# Buffer size used when streaming downloads and zip members to disk.
+_COPY_BUFFER_SIZE = 1 << 20  # 1 MiB
+# Downloads smaller than this stay in memory; larger ones spill to a temp file.
+_SPOOL_MAX_SIZE = 32 * 1024 * 1024  # 32 MiB
+
+
+def _atomic_write(path: str, data: bytes | str, binary: bool = False):
+    """
+    Writes a file atomically.
+
+    The content goes to a temp file in the same directory, is flushed and
+    fsynced, then renamed over the target. `os.replace` is an atomic rename
+    on both POSIX and Windows, so concurrent readers never observe a
+    half-written file and a crash mid-write leaves the previous version
+    intact. This matters most for the alias SQLite DB and the large
+    cards.json that later build steps read.
+
+    Args:
+        - path (str): Final destination path.
+        - data (bytes | str): Content to write.
+        - binary (bool): If True, writes bytes; otherwise UTF-8 text.
+    """
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    mode = "wb" if binary else "w"
+    encoding = None if binary else "utf-8"
+    try:
+        with open(tmp_path, mode, encoding=encoding) as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except OSError:
+        # Clean up the temp file on failure; the original stays untouched.
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
 
 def _load_update_info() -> Dict[str, Any]:
     """
@@ -39,27 +123,36 @@ def _load_update_info() -> Dict[str, Any]:
     such as the timestamp and MD5 hash.
 
     Workflow:
-    1.  Checks if `update_info.json` exists. If not, returns an empty dict.
-    2.  If it exists, it attempts to open, read, and parse the JSON content.
-    3.  Handles potential errors like the file being unreadable (`IOError`),
-        not found (`FileNotFoundError`), or containing invalid JSON
-        (`json.JSONDecodeError`). In these cases, it logs a warning and
+    1.  Attempts to open, read, and parse `update_info.json` directly; a
+        missing file (first run) simply yields an empty dict.
+    2.  Handles potential errors like the file being unreadable (`IOError`)
+        or containing invalid JSON. In these cases, it logs a warning and
         returns an empty dict, forcing a fresh download cycle.
 
     Expected Input:
     - A JSON file (`update_info.json`) on disk, possibly non-existent.
-      Example structure: {"cards": {"last_check": 1672531200, "md5": "..."}}
+      Example structure: {"cards": {"next_check": 1672531200, "md5": "..."}}
 
     Returns:
         - A dictionary containing the cached update info.
           Size: Varies, but typically less than 1KB.
     """
-    if not os.path.exists(UPDATE_INFO_FILE):
-        return {}
     try:
-        with open(UPDATE_INFO_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError, IOError) as e:
+        with open(UPDATE_INFO_FILE, "rb") as f:
+            info = _json_loads(f.read())
+        # One-time migration: older caches stored the last-check timestamp;
+        # convert it to the absolute deadline used by the staleness test.
+        for entry in info.values():
+            if isinstance(entry, dict) and "last_check" in entry:
+                entry["next_check"] = (
+                    entry.pop("last_check") + UPDATE_INTERVAL_SECONDS
+                )
+        return info
+    except FileNotFoundError:
+        # No cache yet (first run) — not worth a warning, and opening
+        # directly avoids a separate exists() stat call.
+        return {}
+    except (ValueError, IOError) as e:
         log.warning(
             "Could not read or parse update_info.json. Starting fresh.",
             file=UPDATE_INFO_FILE,
@@ -82,43 +175,74 @@ def _save_update_info(info: Dict[str, Any]):
         - info (Dict[str, Any]): The dictionary containing the update metadata to save.
     """
     try:
-        with open(UPDATE_INFO_FILE, "w", encoding="utf-8") as f:
-            json.dump(info, f, indent=4)
+        _atomic_write(UPDATE_INFO_FILE, _json_dumps(info), binary=True)
     except IOError as e:
         log.error(
             "Failed to save update info file.", file=UPDATE_INFO_FILE, error=str(e)
         )
 
 
-def _fetch_url(url: str, is_binary: bool = False) -> Optional[bytes | str]:
+def _fetch_url(
+    url: str,
+    is_binary: bool = False,
+    cache_meta: Optional[Dict[str, Any]] = None,
+) -> Optional[bytes | str | object]:
     """
-    Fetches content from a URL with robust error handling.
+    Fetches content from a URL with robust error handling and conditional GET.
 
     Workflow:
-    1.  Sends an HTTP GET request to the specified URL with a 60-second timeout.
-    2.  Calls `response.raise_for_status()` to automatically raise an exception
-        for HTTP error codes (4xx or 5xx).
-    3.  If the request is successful, it returns the response content.
-    4.  If any `requests.exceptions.RequestException` occurs (e.g., timeout,
+    1.  If `cache_meta` carries an `etag`/`last_modified` from a previous
+        response, sends them as `If-None-Match`/`If-Modified-Since` so the
+        server can answer `304 Not Modified` with zero body.
+    2.  Sends an HTTP GET request to the specified URL.
+    3.  On a 304 response, returns the `NOT_MODIFIED` sentinel.
+    4.  Otherwise calls `response.raise_for_status()` to raise on HTTP error
+        codes (4xx or 5xx), records the fresh validators into `cache_meta`
+        (mutated in place), and returns the response content.
+    5.  If any `requests.exceptions.RequestException` occurs (e.g., timeout,
         DNS error, HTTP error), it logs the error and returns `None`.
 
     Args:
         - url (str): The URL to fetch.
         - is_binary (bool): If True, returns content as bytes. Otherwise, returns as a decoded string.
+        - cache_meta (Optional[Dict]): Mutable dict holding `etag` /
+          `last_modified` validators from the previous fetch of this URL.
 
     Returns:
-        - The content as bytes or string, or `None` if an error occurred.
-          Size: Can range from a few bytes (MD5 file) to several megabytes (zip file).
+        - The content as bytes or string, the `NOT_MODIFIED` sentinel, or
+          `None` if an error occurred.
     """
+    headers = {}
+    if cache_meta:
+        if cache_meta.get("etag"):
+            headers["If-None-Match"] = cache_meta["etag"]
+        if cache_meta.get("last_modified"):
+            headers["If-Modified-Since"] = cache_meta["last_modified"]
     try:
-        response = requests.get(url, timeout=60)
+        # Separate connect/read timeouts: fail fast on unreachable hosts while
+        # still allowing slow transfers of the larger files.
+        response = _SESSION.get(url, timeout=(10, 60), headers=headers or None)
+        if response.status_code == 304:
+            return NOT_MODIFIED
         response.raise_for_status()  # Check for HTTP errors
+        if cache_meta is not None:
+            if response.headers.get("ETag"):
+                cache_meta["etag"] = response.headers["ETag"]
+            if response.headers.get("Last-Modified"):
+                cache_meta["last_modified"] = response.headers["Last-Modified"]
         return response.content if is_binary else response.text
     except requests.exceptions.RequestException as e:
         log.error("Network error while fetching URL.", url=url, error=str(e))
         return None
 
 
+def _merge_http_meta(entry: Dict[str, Any], cache_meta: Dict[str, Any]):
+    """Copies HTTP cache validators from a fetch back into a cache entry."""
+    for meta_key in ("etag", "last_modified"):
+        if meta_key in cache_meta:
+            entry[meta_key] = cache_meta[meta_key]
+
+
 def update_local_files(force: bool = False) -> bool:
     """
     Checks for and downloads updates for all necessary data files.
@@ -150,8 +274,36 @@ def update_local_files(force: bool = False) -> bool:
     """
     log.info("--- Starting Data Update Check ---", force_mode=force)
     update_info = _load_update_info()
+    # Snapshot the cache (it is tiny) so an entirely skipped run can avoid
+    # rewriting an identical file at the end.
+    original_info = copy.deepcopy(update_info)
     files_updated = False
 
+    # Fast path: if nothing is forced, every cached deadline is still in the
+    # future, and every file is actually present on disk, there is no work to
+    # do — return with a single summary log instead of walking every target
+    # and emitting per-target messages.
+    if not force:
+        now = time.time()
+        if all(
+            now <= update_info.get(key, {}).get("next_check", 0)
+            for key in ("constants", "setcodes", "alias_db", "cards")
+        ) and all(
+            os.path.exists(path)
+            for path in (
+                LOCAL_CONSTANTS_FILE,
+                LOCAL_SETCODES_FILE,
+                LOCAL_ALIAS_DB_FILE,
+                LOCAL_CARDS_FILE,
+            )
+        ):
+            log.info(
+                "--- Data Update Check Finished ---",
+                files_were_updated=False,
+                all_fresh=True,
+            )
+            return False
+
     # --- Part 1: Generic file updates (based on time interval) ---
     update_targets = {
         "constants": {
@@ -172,80 +324,202 @@ def update_local_files(force: bool = False) -> bool:
         },
     }
 
+    # Decide up front which targets actually need a download. The downloads
+    # are independent, latency-bound requests, so they run concurrently in a
+    # small thread pool; disk writes stay on the main thread to keep the
+    # file-write critical section simple.
+    pending_targets: Dict[str, Dict[str, Any]] = {}
     for key, target in update_targets.items():
         log.info(
-            f"Checking {target['label']}...", file=os.path.basename(target["file"])
+            "Checking for updates",
+            label=target["label"],
+            file=os.path.basename(target["file"]),
         )
         info = update_info.get(key, {})
-        is_stale = time.time() - info.get("last_check", 0) > UPDATE_INTERVAL_SECONDS
+        # Compare against the stored absolute deadline; computed once at
+        # update time instead of re-deriving it from a last-check timestamp.
+        # A missing file is always stale, whatever the cache says.
+        is_stale = time.time() > info.get("next_check", 0) or not os.path.exists(
+            target["file"]
+        )
 
         if force or is_stale:
-            content = _fetch_url(target["url"], is_binary=target.get("binary", False))
-            if content:
-                try:
-                    mode = "wb" if target.get("binary", False) else "w"
-                    encoding = None if target.get("binary", False) else "utf-8"
-                    with open(target["file"], mode, encoding=encoding) as f:
-                        f.write(content)
-                    log.info(
-                        f" -> '{os.path.basename(target['file'])}' has been updated."
-                    )
-                    update_info[key] = {"last_check": time.time()}
-                    files_updated = True
-                except IOError as e:
-                    log.error(f"Failed to write file {target['file']}", error=str(e))
+            pending_targets[key] = target
         else:
             log.info(" -> Update check skipped (within interval).")
 
-    # --- Part 2: Special card data update (based on MD5 check for efficiency) ---
-    log.info("Checking card data (cards.json)...")
+    # The card data check (Part 2) starts with a tiny MD5 fetch; submit it to
+    # the same pool so it overlaps with the generic downloads.
     card_info = update_info.get("cards", {})
-    is_card_stale = (
-        time.time() - card_info.get("last_check", 0) > UPDATE_INTERVAL_SECONDS
+    is_card_stale = time.time() > card_info.get("next_check", 0) or not os.path.exists(
+        LOCAL_CARDS_FILE
+    )
+    check_cards = force or is_card_stale
+
+    md5_payload: Optional[bytes | object] = None
+    # Per-key HTTP validator dicts, mutated by the fetch workers; each worker
+    # owns exactly one dict so there is no cross-thread sharing. Stored
+    # validators are only sent when the file they vouch for still exists and
+    # the run is not forced — otherwise a 304 would "confirm" a copy we no
+    # longer have (or have been told to replace) and the download would be
+    # skipped.
+    cache_metas = {
+        key: (
+            dict(update_info.get(key, {}))
+            if not force and os.path.exists(target["file"])
+            else {}
+        )
+        for key, target in pending_targets.items()
+    }
+    cards_meta = (
+        dict(card_info) if not force and os.path.exists(LOCAL_CARDS_FILE) else {}
     )
+    if pending_targets or check_cards:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            md5_future = (
+                executor.submit(_fetch_url, URLS["cards_md5"], True, cards_meta)
+                if check_cards
+                else None
+            )
+            futures = {
+                executor.submit(
+                    _fetch_url,
+                    target["url"],
+                    target.get("binary", False),
+                    cache_metas[key],
+                ): key
+                for key, target in pending_targets.items()
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                target = pending_targets[key]
+                content = future.result()
+                if content is NOT_MODIFIED:
+                    # The server vouched for our copy; just push the deadline.
+                    log.info(
+                        " -> Server reports file unchanged (304).",
+                        file=os.path.basename(target["file"]),
+                    )
+                    entry = update_info.setdefault(key, {})
+                    entry["next_check"] = time.time() + UPDATE_INTERVAL_SECONDS
+                elif content:
+                    try:
+                        _atomic_write(
+                            target["file"], content, target.get("binary", False)
+                        )
+                        log.info(
+                            " -> File has been updated.",
+                            file=os.path.basename(target["file"]),
+                        )
+                        entry = {
+                            "next_check": time.time() + UPDATE_INTERVAL_SECONDS
+                        }
+                        _merge_http_meta(entry, cache_metas[key])
+                        update_info[key] = entry
+                        files_updated = True
+                    except IOError as e:
+                        log.error(
+                            "Failed to write file.", file=target["file"], error=str(e)
+                        )
+            if md5_future is not None:
+                md5_payload = md5_future.result()
 
-    if force or is_card_stale:
-        md5_text = _fetch_url(URLS["cards_md5"])
-        if md5_text:
+    # --- Part 2: Special card data update (based on MD5 check for efficiency) ---
+    log.info("Checking card data (cards.json)...")
+    if check_cards:
+        if md5_payload is NOT_MODIFIED:
+            # The md5 endpoint vouched for our cached hash — no zip download
+            # can possibly be needed.
+            log.info(" -> Card data unchanged on server (304).")
+            card_entry = update_info.setdefault("cards", {})
+            card_entry["next_check"] = time.time() + UPDATE_INTERVAL_SECONDS
+        elif md5_payload:
             # The MD5 is wrapped in a JS callback function, so we extract it with regex.
-            match = re.search(r'gu\("([a-f0-9]{32})"\);', md5_text)
-            remote_md5 = match.group(1) if match else None
+            match = _MD5_CALLBACK_RE.search(md5_payload)
+            remote_md5 = match.group(1).decode() if match else None
 
             if not remote_md5:
                 log.error(
-                    "Could not parse remote MD5 from callback.", response_text=md5_text
+                    "Could not parse remote MD5 from callback.",
+                    response_text=md5_payload,
                 )
-            elif force or remote_md5 != card_info.get("md5"):
+            elif (
+                force
+                or remote_md5 != card_info.get("md5")
+                or not os.path.exists(LOCAL_CARDS_FILE)
+            ):
                 log.info(
-                    f" -> New version found (MD5: {remote_md5[:12]}...), downloading..."
+                    " -> New version found, downloading...",
+                    md5_prefix=remote_md5[:12],
                 )
-                zip_content = _fetch_url(URLS["cards_zip"], is_binary=True)
-                if zip_content:
-                    try:
-                        # Process the downloaded zip file in memory.
-                        with zipfile.ZipFile(io.BytesIO(zip_content)) as zf:
-                            # Extract only the file we need.
-                            zf.extract("cards.json", path=".")
-                        log.info(
-                            f" -> '{LOCAL_CARDS_FILE}' successfully downloaded and extracted."
-                        )
-                        update_info["cards"] = {
-                            "last_check": time.time(),
-                            "md5": remote_md5,
-                        }
-                        files_updated = True
-                    except (zipfile.BadZipFile, KeyError, IOError) as e:
-                        log.error("Failed to process cards.zip.", error=str(e))
-                else:
-                    log.error("Failed to download cards.zip content.")
+                try:
+                    # Stream the archive through a spooled temp file so peak
+                    # memory stays at one buffer instead of the full payload
+                    # plus a decompressed copy. Small downloads never touch disk.
+                    # The MD5 is folded in chunk-by-chunk so a corrupt download
+                    # is caught here, before it can poison a full build run.
+                    hasher = hashlib.md5(usedforsecurity=False)
+                    with _SESSION.get(
+                        URLS["cards_zip"], stream=True, timeout=(10, 60)
+                    ) as response:
+                        response.raise_for_status()
+                        with tempfile.SpooledTemporaryFile(
+                            max_size=_SPOOL_MAX_SIZE
+                        ) as spool:
+                            for chunk in response.iter_content(_COPY_BUFFER_SIZE):
+                                hasher.update(chunk)
+                                spool.write(chunk)
+                            actual_md5 = hasher.hexdigest()
+                            if actual_md5 != remote_md5:
+                                log.error(
+                                    "MD5 mismatch on downloaded cards.zip; discarding.",
+                                    expected=remote_md5,
+                                    actual=actual_md5,
+                                )
+                                raise ValueError("cards.zip MD5 verification failed")
+                            spool.seek(0)
+                            with zipfile.ZipFile(spool) as zf:
+                                # Copy only the member we need, with a bounded
+                                # buffer instead of zf.extract's full-file read.
+                                # Stream to a temp file and rename it into
+                                # place so readers never see a partial file.
+                                tmp_path = f"{LOCAL_CARDS_FILE}.tmp.{os.getpid()}"
+                                with zf.open("cards.json") as member, open(
+                                    tmp_path, "wb"
+                                ) as f_out:
+                                    shutil.copyfileobj(
+                                        member, f_out, length=_COPY_BUFFER_SIZE
+                                    )
+                                    f_out.flush()
+                                    os.fsync(f_out.fileno())
+                                os.replace(tmp_path, LOCAL_CARDS_FILE)
+                    log.info(
+                        " -> Card data successfully downloaded and extracted.",
+                        file=LOCAL_CARDS_FILE,
+                    )
+                    card_entry = {
+                        "next_check": time.time() + UPDATE_INTERVAL_SECONDS,
+                        "md5": remote_md5,
+                    }
+                    _merge_http_meta(card_entry, cards_meta)
+                    update_info["cards"] = card_entry
+                    files_updated = True
+                except requests.exceptions.RequestException as e:
+                    log.error("Failed to download cards.zip content.", error=str(e))
+                except (zipfile.BadZipFile, KeyError, IOError, ValueError) as e:
+                    log.error("Failed to process cards.zip.", error=str(e))
             else:
                 log.info(" -> 'cards.json' is already up to date.")
-                # Even if no download, update the check time so we don't check again soon.
-                update_info["cards"]["last_check"] = time.time()
+                # Even if no download, push out the deadline so we don't check again soon.
+                card_entry = update_info.setdefault("cards", {})
+                card_entry["next_check"] = time.time() + UPDATE_INTERVAL_SECONDS
+                _merge_http_meta(card_entry, cards_meta)
     else:
         log.info(" -> Update check skipped (within interval).")
 
-    # Persist the updated cache to disk for the next run.
-    _save_update_info(update_info)
+    # Persist the updated cache to disk for the next run, but only when it
+    # actually changed — a fully-skipped run does no JSON work or disk write.
+    if update_info != original_info:
+        _save_update_info(update_info)
     log.info("--- Data Update Check Finished ---", files_were_updated=files_updated)
     return files_updated
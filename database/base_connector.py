@@ -11,7 +11,7 @@ in the future without rewriting the core data processing code.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Tuple, Any, Dict, Iterable
+from typing import List, Tuple, Any, Dict, Iterable, Iterator
 
 
 class DatabaseConnector(ABC):
@@ -73,6 +73,51 @@ class DatabaseConnector(ABC):
         """
         pass
 
+    # SQLite's historical bound-variable ceiling; multi-row statements are
+    # sized to stay below it so the same SQL works on every backend.
+    MAX_BOUND_VARIABLES = 999
+
+    def bulk_insert(
+        self,
+        sql_prefix: str,
+        column_count: int,
+        rows: Iterable[Tuple[Any, ...]],
+    ):
+        """
+        Inserts rows via multi-row `VALUES (...),(...),...` statements.
+
+        Packing many rows into one statement amortizes the per-statement
+        dispatch cost that `executemany` still pays — for SQLite that is
+        statement execution overhead per row, and for D1 it means many rows
+        ride in each network statement instead of one. Rows per statement is
+        derived from `column_count` so the bound-variable total stays within
+        `MAX_BOUND_VARIABLES`.
+
+        Args:
+            - sql_prefix (str): The statement up to the VALUES keyword,
+                                e.g. "INSERT OR IGNORE INTO CardToRace".
+            - column_count (int): Number of columns (placeholders) per row.
+            - rows (Iterable[Tuple[Any, ...]]): An iterable of row tuples.
+        """
+        rows_per_statement = max(1, self.MAX_BOUND_VARIABLES // column_count)
+        placeholder_row = "(" + ",".join("?" * column_count) + ")"
+        full_sql = (
+            f"{sql_prefix} VALUES " + ",".join([placeholder_row] * rows_per_statement)
+        )
+
+        rows = list(rows) if not isinstance(rows, list) else rows
+        offset = 0
+        # Full-size chunks reuse one prepared statement; the tail gets its
+        # own statement sized to exactly the remaining rows.
+        while offset + rows_per_statement <= len(rows):
+            chunk = rows[offset : offset + rows_per_statement]
+            self.execute(full_sql, tuple(v for row in chunk for v in row))
+            offset += rows_per_statement
+        tail = rows[offset:]
+        if tail:
+            tail_sql = f"{sql_prefix} VALUES " + ",".join([placeholder_row] * len(tail))
+            self.execute(tail_sql, tuple(v for row in tail for v in row))
+
     @abstractmethod
     def fetchall(self) -> List[Dict[str, Any] | Tuple[Any, ...]]:
         """
@@ -85,6 +130,48 @@ class DatabaseConnector(ABC):
         """
         pass
 
+    def iter_rows(
+        self, batch_size: int = 10000
+    ) -> Iterator[Dict[str, Any] | Tuple[Any, ...]]:
+        """
+        Yields rows from the result of the last executed SELECT query.
+
+        Unlike `fetchall`, which materializes the complete result list, this
+        lets callers iterate large results with constant memory. The default
+        implementation simply drains `fetchall`, so it works for any
+        connector; implementations with direct cursor access should override
+        it to fetch in `batch_size` chunks instead.
+
+        Args:
+            - batch_size (int): Number of rows an override should fetch per
+                                round-trip to the underlying cursor.
+        """
+        yield from self.fetchall()
+
+    def iter_column(
+        self, sql: str, params: Tuple[Any, ...] = (), column: int = 0
+    ) -> Iterator[Any]:
+        """
+        Executes a SELECT query and yields a single column from each row.
+
+        This is a convenience for the common "load one column into a set"
+        pattern, where materializing every row as a dictionary first is pure
+        overhead. The default implementation goes through `execute` and
+        `fetchall`, so it works for any connector; implementations with direct
+        cursor access should override it to stream plain tuples instead.
+
+        Args:
+            - sql (str): The SELECT query to execute.
+            - params (Tuple[Any, ...]): Parameters to bind to the query.
+            - column (int): Index of the column to yield from each row.
+        """
+        self.execute(sql, params)
+        for row in self.fetchall():
+            if isinstance(row, dict):
+                yield list(row.values())[column]
+            else:
+                yield row[column]
+
     @abstractmethod
     def commit(self):
         """
@@ -9,23 +9,103 @@ This module orchestrates the entire deployment pipeline, which includes:
 3.  Executing the multi-step D1 import process to populate the cleared database.
 """
 
+import gzip
 import hashlib
 import os
-import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import random
+import sqlite3
 import time
-from typing import Any
+from typing import Any, Dict, Optional, Tuple
 import re
 
 import requests
 import structlog
 from cloudflare import Cloudflare
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from config import DB_FILE, SQL_DUMP_FILE, get_d1_config_from_env
+from database.d1_connector import D1Connector, get_cloudflare_client
+from database.sqlite_connector import SQLiteConnector
 
 log = structlog.get_logger(__name__)
 
+# Prefer orjson (a much faster C implementation) for decoding API responses
+# when it is installed, falling back to the response's own stdlib-based
+# `.json()` so no hard dependency is added. The poll loop decodes the same
+# verbose structure on every iteration, which is where this pays off.
+try:
+    import orjson
+
+    def _response_json(response: requests.Response) -> Any:
+        return orjson.loads(response.content)
+
+except ImportError:
+
+    def _response_json(response: requests.Response) -> Any:
+        return response.json()
+
+
+# One pooled session for the whole import workflow. Every step (init,
+# R2 upload, ingest, and each poll) reuses a keep-alive connection instead
+# of paying a fresh TCP+TLS handshake per request; urllib3 pools per host,
+# so the Cloudflare API and the R2 presigned-URL host each get their own
+# connections automatically. Transient errors retry with backoff.
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=10,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET", "POST", "PUT"],
+        ),
+    ),
+)
+
+
+# Regex pattern to find unistr('HEX_STRING') calls, compiled once at module
+# load. It captures the hexadecimal content inside the single quotes.
+_UNISTR_PATTERN = re.compile(r"unistr\('([0-9a-fA-F]+)'\)")
+
+# Statement prefixes stripped from the dump, plus their first characters.
+# Almost every dump line is an INSERT, so testing the first character with a
+# set lookup short-circuits the tuple scan that startswith would otherwise
+# run on all of them.
+_SKIP_PREFIXES = ("PRAGMA", "BEGIN", "COMMIT")
+_SKIP_FIRSTCHARS = frozenset("PBC")
+
+
+def _replace_unistr_match(match: re.Match) -> str:
+    """
+    A helper function called for each `unistr` match found by the regex.
+    It converts the hex representation into a proper, escaped SQL string.
+
+    Each 4-hex-char group is one big-endian UTF-16 code unit, so the whole
+    payload decodes in two C calls (`bytes.fromhex` + `decode`) instead of a
+    Python-level loop over 4-character slices.
+    """
+    hex_string = match.group(1)
+    # The hex string represents Unicode code points, typically 4 hex chars per character.
+    if len(hex_string) % 4 != 0:
+        return match.group(0)  # Return original if format is unexpected
+
+    try:
+        result_string = bytes.fromhex(hex_string).decode("utf-16-be")
+    except (ValueError, UnicodeDecodeError):
+        # If the conversion fails, return the original `unistr(...)` call to avoid breaking the line.
+        return match.group(0)
 
-def dump_sqlite_to_sql() -> bool:
+    # For SQL, single quotes in the string must be escaped by doubling them.
+    # Return the final string literal, wrapped in single quotes for SQL.
+    return "'" + result_string.replace("'", "''") + "'"
+
+
+def dump_sqlite_to_sql() -> Optional[str]:
     """
     Exports the SQLite database to a .sql file and preprocesses it for D1 compatibility.
 
@@ -34,85 +114,76 @@ def dump_sqlite_to_sql() -> bool:
 
     Workflow:
     1.  Checks if the source SQLite database file exists.
-    2.  Invokes the 'sqlite3' command-line utility to dump the database schema and data.
-    3.  Captures the output and processes it line by line.
-    4.  REMOVES transaction control statements (BEGIN, COMMIT, PRAGMA).
-    5.  NEW: FINDS and REPLACES all occurrences of the custom `unistr('...')` function
+    2.  Dumps the database schema and data in-process via `Connection.iterdump`,
+        which emits the same CREATE/INSERT stream as the CLI's `.dump` but with
+        no subprocess fork, no external `sqlite3` binary dependency, and one
+        line in memory at a time.
+    3.  REMOVES transaction control statements (BEGIN, COMMIT, PRAGMA).
+    4.  FINDS and REPLACES all occurrences of the custom `unistr('...')` function
         with standard, D1-compatible Unicode string literals.
-    6.  Writes the fully processed and cleaned SQL commands to the output file.
+    5.  Writes the fully processed and cleaned SQL commands to the output file while
+        folding each written line into an MD5 digest, so the import step does not
+        need a second full pass over the file just to hash it.
 
     Returns:
-        - bool: True if the SQL dump was created successfully, False otherwise.
+        - The MD5 hex digest of the written SQL file on success, or None on failure.
     """
     if not os.path.exists(DB_FILE):
         log.error("Local database not found, cannot create SQL dump.", file=DB_FILE)
-        return False
+        return None
 
     log.info("Dumping local SQLite DB to SQL file...", source=DB_FILE, dest=SQL_DUMP_FILE)
 
-    # Define the regex pattern to find unistr('HEX_STRING') calls.
-    # It captures the hexadecimal content inside the single quotes.
-    unistr_pattern = re.compile(r"unistr\('([0-9a-fA-F]+)'\)")
-
-    def replace_unistr_match(match: re.Match) -> str:
-        """
-        A helper function called for each `unistr` match found by the regex.
-        It converts the hex representation into a proper, escaped SQL string.
-        """
-        hex_string = match.group(1)
-        # The hex string represents Unicode code points, typically 4 hex chars per character.
-        if len(hex_string) % 4 != 0:
-            return match.group(0)  # Return original if format is unexpected
-
-        try:
-            # Convert each 4-char hex sequence to an integer, then to a character.
-            char_codes = [int(hex_string[i:i + 4], 16) for i in range(0, len(hex_string), 4)]
-            result_string = "".join(chr(code) for code in char_codes)
-
-            # For SQL, single quotes in the string must be escaped by doubling them.
-            escaped_string = result_string.replace("'", "''")
-
-            # Return the final string literal, wrapped in single quotes for SQL.
-            return f"'{escaped_string}'"
-        except ValueError:
-            # If any conversion fails, return the original `unistr(...)` call to avoid breaking the line.
-            return match.group(0)
-
+    # The digest is an integrity checksum, not a security boundary —
+    # `usedforsecurity=False` lets OpenSSL pick its fastest MD5 path (and
+    # keeps this working on FIPS-restricted builds).
+    md5 = hashlib.md5(usedforsecurity=False)
     try:
-        with open(SQL_DUMP_FILE, "w", encoding="utf-8") as f_out:
-            # Execute `sqlite3 <db_file> .dump`
-            result = subprocess.run(
-                ["sqlite3", DB_FILE, "-escape","off", ".dump"],
-                capture_output=True,
-                text=True,
-                check=True,
-                encoding="utf-8",
-            )
-
-            # Process the dump output line by line
-            for line in result.stdout.splitlines():
-                # First, strip unsupported transaction statements
-                if not line.startswith(("PRAGMA", "BEGIN", "COMMIT")):
-                    # Then, process the line to replace any `unistr` calls
-                    processed_line = unistr_pattern.sub(replace_unistr_match, line)
-                    f_out.write(processed_line + "\n")
+        # A read-only URI connection guarantees the dump can never mutate
+        # the source database. `iterdump` generates statements lazily, so
+        # they are filtered, written, and hashed as they are produced.
+        src = sqlite3.connect(f"file:{DB_FILE}?mode=ro", uri=True)
+        try:
+            # A 1 MiB output buffer plus chunked writelines keeps the loop at
+            # one write call per ~2000 lines instead of one per line — the
+            # per-call dispatch overhead dominates for dumps with millions of
+            # short INSERT statements.
+            with open(
+                SQL_DUMP_FILE, "w", encoding="utf-8", buffering=1 << 20, newline=""
+            ) as f_out:
+                write_buffer: list = []
+                # Process the dump output line by line
+                for line in src.iterdump():
+                    # First, strip unsupported transaction statements
+                    if not (
+                        line[:1] in _SKIP_FIRSTCHARS
+                        and line.startswith(_SKIP_PREFIXES)
+                    ):
+                        # Then, replace any `unistr` calls. The plain
+                        # substring test skips the regex engine entirely for
+                        # the vast majority of lines that contain none.
+                        if "unistr(" in line:
+                            line = _UNISTR_PATTERN.sub(_replace_unistr_match, line)
+                        out_line = line + "\n"
+                        write_buffer.append(out_line)
+                        md5.update(out_line.encode("utf-8"))
+                        if len(write_buffer) >= 2000:
+                            f_out.writelines(write_buffer)
+                            write_buffer.clear()
+                if write_buffer:
+                    f_out.writelines(write_buffer)
+        finally:
+            src.close()
 
         log.info("SQL dump created and preprocessed for D1 successfully.")
-        return True
-    except FileNotFoundError:
+        return md5.hexdigest()
+    except (sqlite3.Error, OSError) as e:
         log.error(
-            "sqlite3 command not found.",
-            error_type="MissingDependency",
-            details="Ensure the 'sqlite3' command-line tool is installed and in your system's PATH.",
+            "Failed to dump SQLite database.",
+            error_type=type(e).__name__,
+            error=str(e),
         )
-        return False
-    except subprocess.CalledProcessError as e:
-        log.error(
-            "Failed to dump SQLite database via subprocess.",
-            error_type="SubprocessError",
-            stderr=e.stderr,
-        )
-        return False
+        return None
 
 
 def _find_database_by_name(
@@ -154,6 +225,42 @@ def _find_database_by_name(
         return None
 
 
+# The name-to-UUID mapping of a D1 database never changes between builds, so
+# it is resolved at most once per process. Keyed on (account_id, db_name) in
+# case one process ever deploys to several databases.
+_DB_UUID_CACHE: Dict[Tuple[str, str], str] = {}
+
+
+def _find_database_uuid(
+    client: Cloudflare, account_id: str, db_name: str
+) -> Optional[str]:
+    """
+    Resolves a D1 database name to its UUID, caching the result per process.
+
+    Repeated deployments from the same process (e.g. a CI loop) skip the
+    `d1.database.list` round-trip and its linear scan after the first call.
+
+    Args:
+        - client (Cloudflare): An authenticated `cloudflare-python` client instance.
+        - account_id (str): The Cloudflare account ID.
+        - db_name (str): The human-readable name of the database to find.
+
+    Returns:
+        - The database UUID (str) if found, otherwise None.
+    """
+    cache_key = (account_id, db_name)
+    cached_uuid = _DB_UUID_CACHE.get(cache_key)
+    if cached_uuid:
+        log.info("Using cached D1 database UUID.", uuid=cached_uuid)
+        return cached_uuid
+
+    database = _find_database_by_name(client, account_id, db_name)
+    if database is None:
+        return None
+    _DB_UUID_CACHE[cache_key] = database.uuid
+    return database.uuid
+
+
 def clear_d1_database(client: Cloudflare, account_id: str, db_id: str) -> bool:
     """
     Clears all tables from the specified D1 database without deleting the database itself.
@@ -197,9 +304,15 @@ def clear_d1_database(client: Cloudflare, account_id: str, db_id: str) -> bool:
             log.info("Database is already empty. No tables to drop.")
             return True
 
-        # 2. Generate and execute DROP TABLE statements
+        # 2. Generate and execute DROP TABLE statements. Identifiers are
+        # double-quoted (with embedded quotes doubled) so table names that
+        # are keywords or contain odd characters cannot break the statement.
         log.warning("Tables to be dropped:", tables=tables_to_drop)
-        drop_statements = [f"DROP TABLE IF EXISTS {name};" for name in tables_to_drop if not name.startswith("_") ]
+        drop_statements = [
+            'DROP TABLE IF EXISTS "' + name.replace('"', '""') + '";'
+            for name in tables_to_drop
+            if not name.startswith("_")
+        ]
         batch_sql = " ".join(drop_statements)
         if len(batch_sql) > 0:
             log.info("Executing batch DROP TABLE statement...")
@@ -224,7 +337,9 @@ def clear_d1_database(client: Cloudflare, account_id: str, db_id: str) -> bool:
         return False
 
 
-def upload_and_import_sql(account_id: str, api_token: str, db_id: str) -> bool:
+def upload_and_import_sql(
+    account_id: str, api_token: str, db_id: str, md5_hash: str
+) -> bool:
     """
     Executes the full D1 file import workflow using raw HTTP requests.
 
@@ -232,9 +347,9 @@ def upload_and_import_sql(account_id: str, api_token: str, db_id: str) -> bool:
     `cloudflare-python` library does not offer a high-level wrapper for it.
 
     Workflow:
-    1.  **Init Upload**: Calculates the MD5 hash of the SQL file. Sends a request
-        to the D1 API to initialize an import. Cloudflare validates the hash and
-        returns a temporary, pre-signed R2 upload URL.
+    1.  **Init Upload**: Sends a request to the D1 API to initialize an import,
+        using the MD5 hash computed while the SQL dump was written. Cloudflare
+        validates the hash and returns a temporary, pre-signed R2 upload URL.
     2.  **Upload to R2**: Puts the SQL file content to the pre-signed URL. After
         the upload, it verifies that the ETag (MD5 hash) returned by R2 matches
         the one calculated locally to ensure file integrity during transit.
@@ -248,6 +363,8 @@ def upload_and_import_sql(account_id: str, api_token: str, db_id: str) -> bool:
         - account_id (str): The Cloudflare account ID.
         - api_token (str): The Cloudflare API token.
         - db_id (str): The UUID of the target D1 database.
+        - md5_hash (str): MD5 hex digest of the SQL dump file, as returned by
+                          `dump_sqlite_to_sql`.
 
     Returns:
         - bool: True if the import process completes successfully, False otherwise.
@@ -255,33 +372,50 @@ def upload_and_import_sql(account_id: str, api_token: str, db_id: str) -> bool:
     d1_api_url = f"https://api.cloudflare.com/client/v4/accounts/{account_id}/d1/database/{db_id}/import"
     headers = {"Authorization": f"Bearer {api_token}"}
 
-    try:
-        with open(SQL_DUMP_FILE, "rb") as f:
-            sql_content = f.read()
+    upload_path = SQL_DUMP_FILE
+    upload_headers = {"Content-Type": "application/octet-stream"}
 
-        md5_hash = hashlib.md5(sql_content).hexdigest()
-        log.info("Calculated MD5 hash for SQL file.", hash=md5_hash)
+    try:
+        # Optional gzip upload (set D1_IMPORT_GZIP=1). SQL dumps full of
+        # repeated INSERT prefixes compress 5-10x, cutting upload time
+        # proportionally on slow uplinks. Off by default because the D1
+        # import pipeline does not document compressed-payload support; the
+        # init etag and the R2 ETag check then cover the gzipped bytes.
+        if os.getenv("D1_IMPORT_GZIP") == "1":
+            upload_path = SQL_DUMP_FILE + ".gz"
+            log.info("Compressing SQL dump for upload...", dest=upload_path)
+            with open(SQL_DUMP_FILE, "rb") as src:
+                with gzip.open(upload_path, "wb", compresslevel=6) as dst:
+                    while chunk := src.read(1 << 20):
+                        dst.write(chunk)
+            with open(upload_path, "rb") as fh:
+                md5_hash = hashlib.file_digest(fh, "md5").hexdigest()
+            upload_headers["Content-Encoding"] = "gzip"
+
+        log.info("Using MD5 hash computed during SQL dump.", hash=md5_hash)
 
         # Step 1: Init Upload
         log.info("[1/4] Initializing D1 import...")
-        init_res = requests.post(
+        init_res = _SESSION.post(
             d1_api_url, headers=headers, json={"action": "init", "etag": md5_hash}
         )
         init_res.raise_for_status()
-        upload_data = init_res.json()["result"]
+        upload_data = _response_json(init_res)["result"]
         upload_url = upload_data.get("upload_url")
         if not upload_url:
             log.info("API 'init' response did not contain an 'upload_url'.",message=[upload_data])
             raise ValueError
         log.info("Import initialized, received R2 upload URL.")
 
-        # Step 2: Upload to R2
+        # Step 2: Upload to R2. Passing the open file handle lets urllib3
+        # stream it in chunks, so peak memory stays flat no matter how large
+        # the dump is; the explicit Content-Length avoids chunked encoding,
+        # which presigned R2 URLs do not accept.
         log.info("[2/4] Uploading SQL file to R2 presigned URL...")
-        r2_res = requests.put(
-            upload_url,
-            data=sql_content,
-            headers={"Content-Type": "application/octet-stream"},
-        )
+        dump_size = os.path.getsize(upload_path)
+        upload_headers["Content-Length"] = str(dump_size)
+        with open(upload_path, "rb") as fh:
+            r2_res = _SESSION.put(upload_url, data=fh, headers=upload_headers)
         r2_res.raise_for_status()
         r2_etag = r2_res.headers.get("ETag", "").strip('"')
         if r2_etag != md5_hash:
@@ -292,7 +426,7 @@ def upload_and_import_sql(account_id: str, api_token: str, db_id: str) -> bool:
 
         # Step 3: Start Ingestion
         log.info("[3/4] Starting D1 ingestion process...")
-        ingest_res = requests.post(
+        ingest_res = _SESSION.post(
             d1_api_url,
             headers=headers,
             json={
@@ -302,23 +436,28 @@ def upload_and_import_sql(account_id: str, api_token: str, db_id: str) -> bool:
             },
         )
         ingest_res.raise_for_status()
-        ingest_data = ingest_res.json()["result"]
+        ingest_data = _response_json(ingest_res)["result"]
         current_bookmark = ingest_data.get("at_bookmark")
         if not current_bookmark:
             raise ValueError("API 'ingest' response did not include an 'at_bookmark'.")
         log.info("Ingestion started.", bookmark=current_bookmark)
 
-        # Step 4: Polling for completion
+        # Step 4: Polling for completion. The delay starts small so tiny
+        # imports finish in well under a second of waiting, then doubles up
+        # to a 5s cap for long-running ones. Jitter spreads out polls when
+        # several deploys run concurrently in CI.
         log.info("[4/4] Polling for import completion status...")
+        poll_delay = 0.25
+        last_messages = None
         while True:
-            time.sleep(2)  # Wait for 2 seconds between polls
-            poll_res = requests.post(
+            time.sleep(poll_delay * (0.8 + 0.4 * random.random()))
+            poll_res = _SESSION.post(
                 d1_api_url,
                 headers=headers,
                 json={"action": "poll", "current_bookmark": current_bookmark},
             )
             poll_res.raise_for_status()
-            poll_data = poll_res.json()["result"]
+            poll_data = _response_json(poll_res)["result"]
 
             if poll_data.get("status") == "complete":
                 log.info("D1 import completed successfully!")
@@ -330,6 +469,14 @@ def upload_and_import_sql(account_id: str, api_token: str, db_id: str) -> bool:
             log.info(
                 "Polling... import in progress.", messages=poll_data.get("messages", [poll_data])
             )
+            # New messages mean the job is making progress — sample faster
+            # again; otherwise keep backing off toward the cap.
+            messages = poll_data.get("messages")
+            if messages != last_messages:
+                last_messages = messages
+                poll_delay = 0.25
+            else:
+                poll_delay = min(poll_delay * 2, 5.0)
 
     except (requests.RequestException, ValueError) as e:
         log.exception(
@@ -337,10 +484,108 @@ def upload_and_import_sql(account_id: str, api_token: str, db_id: str) -> bool:
         )
         return False
     finally:
-        # Final cleanup of the temporary SQL dump file.
-        if os.path.exists(SQL_DUMP_FILE):
-            os.remove(SQL_DUMP_FILE)
-            log.info("Cleaned up temporary SQL dump file.", file=SQL_DUMP_FILE)
+        # Final cleanup of the temporary SQL dump file(s).
+        for dump_path in {SQL_DUMP_FILE, upload_path}:
+            if os.path.exists(dump_path):
+                os.remove(dump_path)
+                log.info("Cleaned up temporary SQL dump file.", file=dump_path)
+
+
+# Databases up to this size skip the 4-step file-import pipeline (init, R2
+# upload, ingest, poll) and stream batched INSERTs straight to the /query
+# endpoint instead — the import pipeline's fixed ~5-8s latency dominates for
+# small payloads, while batching dominates for large ones.
+_BATCH_DEPLOY_MAX_BYTES = 25 * 1024 * 1024
+
+
+def deploy_via_batch(account_id: str, api_token: str, db_id: str) -> bool:
+    """
+    Deploys the local database directly over batched D1 /query statements.
+
+    This is the fast path for small databases: it replays the schema DDL and
+    streams each table's rows as parameterized INSERT batches, avoiding the
+    text dump, the R2 upload, and the ingest/poll rounds entirely. The target
+    database is expected to have been cleared beforehand.
+
+    Workflow:
+    1.  Opens the local SQLite database and reads all user DDL from
+        `sqlite_master` (tables first, then their indexes, in schema order).
+    2.  Executes each DDL statement against D1.
+    3.  For each user table, streams its rows in chunks and sends them via
+        `D1Connector.executemany`, which batches and parallelizes the POSTs.
+
+    Args:
+        - account_id (str): The Cloudflare account ID.
+        - api_token (str): The Cloudflare API token.
+        - db_id (str): The UUID of the target D1 database.
+
+    Returns:
+        - bool: True if the deployment completed successfully, False otherwise.
+    """
+    log.info("Deploying via batched D1 statements (small-database path)...")
+    local_db = SQLiteConnector()
+    d1 = D1Connector(
+        {
+            "d1_account_id": account_id,
+            "d1_database_id": db_id,
+            "d1_api_token": api_token,
+        }
+    )
+    try:
+        local_db.connect()
+
+        # 1. Replay the schema. sqlite_master order puts tables before the
+        # indexes that reference them, so a single pass is safe. The
+        # leading-underscore exclusion happens in Python (as in
+        # `clear_d1_database`) because `_` is a single-character wildcard
+        # in SQL LIKE, so `NOT LIKE '_%'` would exclude every name.
+        local_db.execute(
+            "SELECT name, sql FROM sqlite_master "
+            "WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'"
+        )
+        for row in local_db.fetchall():
+            if not row["name"].startswith("_"):
+                d1.execute(row["sql"])
+
+        # 2. Stream each table's rows as parameterized INSERT batches.
+        local_db.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+        )
+        tables = [
+            row["name"]
+            for row in local_db.fetchall()
+            if not row["name"].startswith("_")
+        ]
+        for table in tables:
+            quoted_name = '"' + table.replace('"', '""') + '"'
+            local_db.execute(f"SELECT * FROM {quoted_name}")
+            insert_sql = None
+            pending = []
+            total_rows = 0
+            for row in local_db.iter_rows():
+                values = tuple(row.values())
+                if insert_sql is None:
+                    placeholders = ", ".join("?" * len(values))
+                    insert_sql = f"INSERT INTO {quoted_name} VALUES ({placeholders})"
+                pending.append(values)
+                total_rows += 1
+                # Flush periodically so memory stays bounded regardless of
+                # table size; executemany handles the per-request batching.
+                if len(pending) >= 1000:
+                    d1.executemany(insert_sql, pending)
+                    pending = []
+            if pending:
+                d1.executemany(insert_sql, pending)
+            log.info("Table deployed via batch.", table=table, rows=total_rows)
+
+        return True
+    except (ConnectionError, sqlite3.Error) as e:
+        log.exception("Batch deployment to D1 failed.", error=str(e))
+        return False
+    finally:
+        local_db.close()
+        d1.close()
 
 
 def run_d1_deployment():
@@ -351,10 +596,15 @@ def run_d1_deployment():
 
     Workflow:
     1.  Loads Cloudflare credentials.
-    2.  Dumps the local SQLite database to a `.sql` file.
-    3.  Finds the target D1 database by its name to get its UUID.
+    2.  Picks the migration strategy by database size: small databases go
+        straight over batched /query statements, large ones through the
+        SQL-dump file-import pipeline (the dump is prepared up front so a
+        dump failure never clears the remote database).
+    3.  Finds the target D1 database by its name to get its UUID. The lookup
+        is pure network wait while the dump is pure CPU+disk, so the two run
+        concurrently.
     4.  Calls `clear_d1_database()` to wipe all tables from the target database.
-    5.  Calls `upload_and_import_sql()` to migrate the new data.
+    5.  Runs the selected migration path.
     """
     log.info("--- Starting Deployment to Cloudflare D1 (Non-Destructive) ---")
 
@@ -364,15 +614,27 @@ def run_d1_deployment():
     api_token = d1_config["d1_api_token"]
     db_name = d1_config["d1_database_name"]
 
-    # Step 2: Prepare the data dump.
-    if not dump_sqlite_to_sql():
-        log.error("Halting deployment due to SQL dump failure.")
+    # Step 2: Pick the strategy and, for the file-import path, prepare the
+    # dump (its MD5 is computed during the write) before touching D1.
+    if not os.path.exists(DB_FILE):
+        log.error("Local database not found, cannot deploy.", file=DB_FILE)
         return
-
-    # Step 3: Find the database and clear it.
-    client = Cloudflare(api_token=api_token)
-    database = _find_database_by_name(client, account_id, db_name)
-    if not database:
+    use_batch = os.path.getsize(DB_FILE) <= _BATCH_DEPLOY_MAX_BYTES
+
+    # Step 3: Resolve the target database UUID in the background while the
+    # dump runs on this thread, then clear it.
+    client = get_cloudflare_client(api_token)
+    md5_hash = None
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        uuid_future = executor.submit(_find_database_uuid, client, account_id, db_name)
+        if not use_batch:
+            md5_hash = dump_sqlite_to_sql()
+            if not md5_hash:
+                log.error("Halting deployment due to SQL dump failure.")
+                return
+        db_id = uuid_future.result()
+
+    if not db_id:
         log.error(
             "Target D1 database not found. Please create it in the Cloudflare dashboard first.",
             name=db_name,
@@ -380,13 +642,18 @@ def run_d1_deployment():
         )
         return
 
-    db_id = database.uuid
     if not clear_d1_database(client, account_id, db_id):
+        # A stale cached UUID (e.g. database recreated) would fail here, so
+        # drop it to force a fresh lookup on the next attempt.
+        _DB_UUID_CACHE.pop((account_id, db_name), None)
         log.error("Halting deployment due to database clearing failure.")
         return
 
-    # Step 4: Perform the upload and import.
-    success = upload_and_import_sql(account_id, api_token, db_id)
+    # Step 4: Perform the migration along the selected path.
+    if use_batch:
+        success = deploy_via_batch(account_id, api_token, db_id)
+    else:
+        success = upload_and_import_sql(account_id, api_token, db_id, md5_hash)
 
     if success:
         log.info("--- Cloudflare D1 Deployment Successful! ---")
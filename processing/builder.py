@@ -8,11 +8,13 @@ on the `DatabaseConnector` interface, this module remains independent of the
 underlying database technology (SQLite, D1, etc.).
 """
 
+import itertools
 import json
 import os
 import re
-from collections import Counter
-from typing import Dict, Tuple, Set, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 import structlog
 
@@ -22,22 +24,167 @@ from config import LOCAL_CARDS_FILE, DECK_DIR
 
 log = structlog.get_logger(__name__)
 
+# Prefer ijson (an incremental C-backed parser) for cards.json when it is
+# installed: the file is iterated one card at a time instead of materializing
+# a ~30-40 MB dict up front. The stdlib fallback keeps this a soft dependency.
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Prefer orjson (a much faster Rust decoder, 2-5x on typical payloads) for
+# the thousands of small deck files and the non-streamed cards.json path.
+# Its JSONDecodeError subclasses ValueError just like the stdlib's, so the
+# existing except clauses cover both implementations.
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# How many cards accumulate in the insert buffers before they are flushed to
+# the database. Bounds peak memory while keeping executemany batches large
+# enough that per-call overhead stays negligible.
+_CARD_FLUSH_THRESHOLD = 2000
+
+# Same idea for decks: each deck contributes one Decks row plus dozens of
+# DeckCards rows, so 500 decks per flush keeps batches in the low thousands.
+_DECK_FLUSH_THRESHOLD = 500
+
+# Every YDK token the parser cares about — card ID lines, the section
+# markers, and the cosmetic markers — folded into one alternation, so a
+# single finditer pass over the deck string replaces separate scans for
+# section splitting, per-block ID extraction, and cosmetics. Exactly one
+# group per alternative is non-None in each match, which is what the
+# dispatch in `_parse_deck_ydk` keys on. The marker alternative's trailing
+# run is `[^\n]*` rather than `[^\r\n]*` so it can consume the `\r` of a
+# CRLF line ending — under MULTILINE, `$` asserts only before `\n`, so a
+# stray `\r` left unconsumed would make the alternative fail to match.
+# In the real corpus the cosmetic value sits on the line AFTER its marker
+# with a trailing `#` ("#case\n1080001#"), so the cosmetic alternative's
+# `\s*` is allowed to span the newline and an optional `#` follows the
+# digits; the value line is consumed by the match and never mistaken for
+# a card ID.
+_YDK_TOKEN_RE = re.compile(
+    r"(?m)^(?:\s*(\d+)\s*|(#extra|!side)[^\n]*|#(case|protector)\s*(\d+)#?\s*)$"
+)
+
+# Threads used to read deck files concurrently. Deck files are a few KB each,
+# so the win comes from keeping this many reads queued at the disk, not from
+# CPU parallelism; 16 saturates typical SSD queue depths.
+_DECK_READ_WORKERS = 16
+
+
+def _read_deck_file(path: str) -> Tuple[str, Optional[bytes]]:
+    """Reads one deck file, mapping read errors to a None payload."""
+    try:
+        with open(path, "rb") as f:
+            return path, f.read()
+    except OSError as e:
+        log.debug("Skipping invalid or unreadable deck file.", file=path, error=str(e))
+        return path, None
+
+
+def _parse_deck_ydk(
+    ydk_str: str,
+    valid_card_ids: frozenset,
+    alias_map: Dict[int, int],
+) -> Tuple[Dict[str, List[int]], Optional[int], int, int]:
+    """
+    Parses one YDK string into resolved sections, validity, and cosmetics.
+
+    This is the hottest per-deck code path. One `_YDK_TOKEN_RE.finditer`
+    pass walks the whole string in the C regex engine, recognizing card ID
+    lines, section markers, and cosmetic markers in the same scan — where
+    the previous shape needed separate traversals for section splitting,
+    per-block ID extraction, and cosmetics.
+
+    Returns:
+        - A tuple `(resolved_cards, invalid_id, deck_case, deck_protector)`.
+          `invalid_id` is None for a valid deck; otherwise it is one of the
+          offending card IDs and the cosmetics are left at zero.
+    """
+    sections: Dict[str, List[int]] = {"main": [], "extra": [], "side": []}
+    current_section = sections["main"]
+    deck_case = deck_protector = 0
+
+    for match in _YDK_TOKEN_RE.finditer(ydk_str):
+        card_id_text = match.group(1)
+        if card_id_text is not None:
+            current_section.append(int(card_id_text))
+        elif match.group(2) is not None:
+            current_section = sections[
+                "extra" if match.group(2) == "#extra" else "side"
+            ]
+        elif match.group(3) == "case":
+            deck_case = int(match.group(4))
+        else:
+            deck_protector = int(match.group(4))
+
+    if alias_map:
+        alias_get = alias_map.get
+        for section_name, card_ids in sections.items():
+            sections[section_name] = [
+                alias_get(card_id, card_id) for card_id in card_ids
+            ]
+
+    # Validation Step: one C-level subset test over the whole deck at
+    # once, rather than a membership check per card or per block.
+    all_ids = set(sections["main"])
+    all_ids.update(sections["extra"], sections["side"])
+    if not all_ids.issubset(valid_card_ids):
+        return sections, min(all_ids - valid_card_ids), 0, 0
+
+    return sections, None, deck_case, deck_protector
+
+
+def _iter_deck_payloads(paths: List[str]) -> Iterator[Tuple[str, Optional[bytes]]]:
+    """
+    Yields `(path, raw_bytes)` for each deck file, reading via a thread pool.
+
+    The pool overlaps the open()/read() latency of thousands of small files
+    (the GIL is released during file I/O). Futures are submitted in a
+    bounded window and consumed in submission order — `executor.map` is
+    avoided because it submits every task eagerly, and with readers
+    outpacing the parse/insert consumer the raw bytes of the whole
+    directory would pile up in completed-but-unconsumed futures. The
+    window caps that buffering at twice the pool size while callers still
+    see the same sequence a serial loop would produce.
+    """
+    window_size = _DECK_READ_WORKERS * 2
+    with ThreadPoolExecutor(max_workers=_DECK_READ_WORKERS) as executor:
+        paths_iter = iter(paths)
+        window = deque(
+            executor.submit(_read_deck_file, path)
+            for path in itertools.islice(paths_iter, window_size)
+        )
+        while window:
+            yield window.popleft().result()
+            for path in itertools.islice(paths_iter, 1):
+                window.append(executor.submit(_read_deck_file, path))
+
+
 
 def create_schema(db: DatabaseConnector):
     """
-    Creates all necessary tables and indexes in the database.
+    Creates all necessary tables in the database.
 
     The schema is designed to be compatible with both SQLite and Cloudflare D1.
     It has been updated to include fields for deck cosmetics (`deckCase`, `deckProtector`)
     and cover cards to support the target API's response structure.
 
+    Indexes are deliberately NOT created here: every insert would otherwise
+    have to maintain them throughout the bulk load. `create_indexes` builds
+    them in one pass after the data is in, which is substantially cheaper.
+
     Note: While the schema defines FOREIGN KEYs, their enforcement depends on the
     database backend (SQLite supports it, D1 currently does not enforce them).
 
     Args:
         - db (DatabaseConnector): An active database connector instance.
     """
-    log.info("Creating database schema (tables and indexes)...")
+    log.info("Creating database schema (tables)...")
     schema_statements = [
         # Stores deck metadata. deck_id is the primary key.
         # This table includes cosmetic and cover card data parsed from the YDK.
@@ -74,15 +221,34 @@ def create_schema(db: DatabaseConnector):
         "CREATE TABLE IF NOT EXISTS CardToAttribute (card_id INTEGER NOT NULL, attribute_code INTEGER NOT NULL, PRIMARY KEY (card_id, attribute_code))",
         "CREATE TABLE IF NOT EXISTS CardToType (card_id INTEGER NOT NULL, type_code INTEGER NOT NULL, PRIMARY KEY (card_id, type_code))",
         "CREATE TABLE IF NOT EXISTS CardToSetcode (card_id INTEGER NOT NULL, set_code INTEGER NOT NULL, PRIMARY KEY (card_id, set_code))",
-        # Indexes to dramatically speed up common search and sort operations.
+    ]
+    for statement in schema_statements:
+        db.execute(statement)
+    log.info("Schema creation complete.")
+
+
+def create_indexes(db: DatabaseConnector):
+    """
+    Creates the secondary indexes after the bulk load has finished.
+
+    Building an index over a populated table is one sorted pass; maintaining
+    it incrementally during the load costs a B-tree update per inserted row.
+    Call this once all `process_*` functions have run, before the final commit.
+
+    Args:
+        - db (DatabaseConnector): An active database connector instance.
+    """
+    log.info("Creating database indexes...")
+    # Indexes to dramatically speed up common search and sort operations.
+    index_statements = [
         "CREATE INDEX IF NOT EXISTS idx_decks_user_id ON Decks(user_id)",
         "CREATE INDEX IF NOT EXISTS idx_decks_like ON Decks(deck_like)",
         "CREATE INDEX IF NOT EXISTS idx_decks_update_date ON Decks(update_date)",
         "CREATE INDEX IF NOT EXISTS idx_deckcards_card_id ON DeckCards(card_id)",
     ]
-    for statement in schema_statements:
+    for statement in index_statements:
         db.execute(statement)
-    log.info("Schema creation complete.")
+    log.info("Index creation complete.")
 
 
 def populate_lookup_tables(
@@ -140,22 +306,24 @@ def process_cards(
     transforms the data, and prepares it for efficient batch insertion.
 
     Workflow:
-    1.  Loads the entire `cards.json` file into memory. (File size is ~30-40MB,
-        which is acceptable for modern systems).
+    1.  Opens `cards.json` and iterates it card by card — streamed via `ijson`
+        when available, otherwise loaded whole with the stdlib parser.
     2.  Initializes several empty lists to act as in-memory buffers for the data
-        that will be inserted into each table.
+        that will be inserted into each table; the buffers are flushed to the
+        database every `_CARD_FLUSH_THRESHOLD` cards so peak memory stays
+        bounded regardless of file size.
     3.  Iterates through every card in the JSON data. For each card:
-        a. Extracts the primary card data and appends it as a tuple to `cards_to_insert`.
-        b. For bitmask fields (Race, Attribute, Type), it performs a bitwise AND
-           operation (`&`) against every known code from the parsed maps. If the
-           result matches the code, it signifies a relationship, which is appended
-           to the appropriate relation list (e.g., `card_races`).
+        a. Extracts the primary card data and appends it as a tuple to the
+           cards buffer.
+        b. For bitmask fields (Race, Attribute, Type), it decomposes the value
+           into every known code it contains. Cards overwhelmingly share a
+           small set of distinct bitmask values, so each value is decomposed
+           once and the result reused from a cache.
         c. For the `setcode`, it performs a simple, exact-match lookup in the `setcode_map`.
-    4.  After iterating through all ~15,000+ cards, it performs a series of
-        high-performance `executemany` calls to bulk-insert the contents of the
-        buffered lists into the database. `INSERT OR REPLACE` is used for the `Cards`
-        table to ensure the latest data is present, while `INSERT OR IGNORE` is
-        used for relation tables.
+    4.  Each flush performs a series of high-performance `executemany` calls to
+        bulk-insert the buffered lists. `INSERT OR REPLACE` is used for the
+        `Cards` table to ensure the latest data is present, while
+        `INSERT OR IGNORE` is used for relation tables.
 
     Args:
         - db (DatabaseConnector): An active database connector.
@@ -165,15 +333,6 @@ def process_cards(
     log.info("Processing card data from cards.json...", file=LOCAL_CARDS_FILE)
     race_map, attribute_map, type_map = maps
 
-    try:
-        with open(LOCAL_CARDS_FILE, "r", encoding="utf-8") as f:
-            all_cards_data = json.load(f)
-    except (IOError, FileNotFoundError, json.JSONDecodeError) as e:
-        log.error(
-            "Failed to read or parse cards.json, cannot process cards.", error=str(e)
-        )
-        return
-
     # In-memory buffers for batch insertion.
     cards_to_insert, card_races, card_attrs, card_types, card_setcodes = (
         [],
@@ -182,54 +341,120 @@ def process_cards(
         [],
         [],
     )
+    total_cards = 0
+
+    # Memoized bitmask decomposition. ~15k cards carry only a few dozen
+    # distinct race/attribute/type values, so the code scan runs once per
+    # distinct value instead of once per card — the rest is a dict hit.
+    race_codes, attr_codes, type_codes = (
+        tuple(race_map),
+        tuple(attribute_map),
+        tuple(type_map),
+    )
+    race_cache: Dict[int, Tuple[int, ...]] = {}
+    attr_cache: Dict[int, Tuple[int, ...]] = {}
+    type_cache: Dict[int, Tuple[int, ...]] = {}
+
+    # Seed the caches with the trivial decompositions: most cards carry
+    # exactly one race/attribute code (and many carry none), so the common
+    # cases never take the code-scan miss path at all.
+    for codes, cache in (
+        (race_codes, race_cache),
+        (attr_codes, attr_cache),
+        (type_codes, type_cache),
+    ):
+        cache[0] = ()
+        for code in codes:
+            cache[code] = (code,)
+
+    # Only membership matters for the per-card setcode check; a frozenset
+    # of the keys is the leanest structure for that test.
+    known_setcodes = frozenset(setcode_map)
+
+    def _decompose(
+        value: int, codes: Tuple[int, ...], cache: Dict[int, Tuple[int, ...]]
+    ) -> Tuple[int, ...]:
+        hits = cache.get(value)
+        if hits is None:
+            hits = tuple(code for code in codes if (value & code) == code)
+            cache[value] = hits
+        return hits
+
+    def _flush_buffers():
+        # Multi-row VALUES statements pack ~99 cards (or ~499 relation
+        # pairs) per statement, cutting per-statement dispatch versus
+        # executemany's one statement per row.
+        db.bulk_insert("INSERT OR REPLACE INTO Cards", 10, cards_to_insert)
+        db.bulk_insert("INSERT OR IGNORE INTO CardToRace", 2, card_races)
+        db.bulk_insert("INSERT OR IGNORE INTO CardToAttribute", 2, card_attrs)
+        db.bulk_insert("INSERT OR IGNORE INTO CardToType", 2, card_types)
+        db.bulk_insert("INSERT OR IGNORE INTO CardToSetcode", 2, card_setcodes)
+        for buffer in (cards_to_insert, card_races, card_attrs, card_types, card_setcodes):
+            buffer.clear()
+
+    parse_errors = (IOError, FileNotFoundError, ValueError)
+    if ijson is not None:
+        parse_errors += (ijson.JSONError,)
 
-    for _, data in all_cards_data.items():
-        card_id = data.get("id")
-        if not card_id:
-            log.warning("Skipping card with no ID.", card_data=data)
-            continue
-
-        cards_to_insert.append(
-            (
-                card_id,
-                data.get("cid"),
-                data.get("cn_name"),
-                data.get("jp_name"),
-                data.get("en_name"),
-                data.get("text", {}).get("types"),
-                data.get("text", {}).get("desc"),
-                data.get("data", {}).get("atk"),
-                data.get("data", {}).get("def"),
-                data.get("data", {}).get("level"),
-            )
+    try:
+        with open(LOCAL_CARDS_FILE, "rb") as f:
+            if ijson is not None:
+                # Yields (card_key, card_dict) pairs without ever holding the
+                # whole file's object tree in memory.
+                card_items = ijson.kvitems(f, "", use_float=True)
+            else:
+                # orjson has no load(); reading the file whole is what the
+                # stdlib would do internally anyway.
+                card_items = _json_loads(f.read()).items()
+
+            for _, data in card_items:
+                card_id = data.get("id")
+                if not card_id:
+                    log.warning("Skipping card with no ID.", card_data=data)
+                    continue
+
+                cards_to_insert.append(
+                    (
+                        card_id,
+                        data.get("cid"),
+                        data.get("cn_name"),
+                        data.get("jp_name"),
+                        data.get("en_name"),
+                        data.get("text", {}).get("types"),
+                        data.get("text", {}).get("desc"),
+                        data.get("data", {}).get("atk"),
+                        data.get("data", {}).get("def"),
+                        data.get("data", {}).get("level"),
+                    )
+                )
+                total_cards += 1
+
+                d = data.get("data", {})
+                # Process bitmask fields via the memoized decomposition.
+                for code in _decompose(d.get("race", 0), race_codes, race_cache):
+                    card_races.append((card_id, code))
+                for code in _decompose(d.get("attribute", 0), attr_codes, attr_cache):
+                    card_attrs.append((card_id, code))
+                for code in _decompose(d.get("type", 0), type_codes, type_cache):
+                    card_types.append((card_id, code))
+
+                # Process setcode.
+                card_setcode_value = d.get("setcode", 0)
+                if card_setcode_value and card_setcode_value in known_setcodes:
+                    card_setcodes.append((card_id, card_setcode_value))
+
+                # Flush periodically so the buffers never outgrow one batch.
+                if len(cards_to_insert) >= _CARD_FLUSH_THRESHOLD:
+                    _flush_buffers()
+    except parse_errors as e:
+        log.error(
+            "Failed to read or parse cards.json, cannot process cards.", error=str(e)
         )
+        return
 
-        d = data.get("data", {})
-        # Process bitmask fields.
-        for code in race_map:
-            if (d.get("race", 0) & code) == code:
-                card_races.append((card_id, code))
-        for code in attribute_map:
-            if (d.get("attribute", 0) & code) == code:
-                card_attrs.append((card_id, code))
-        for code in type_map:
-            if (d.get("type", 0) & code) == code:
-                card_types.append((card_id, code))
-
-        # Process setcode.
-        card_setcode_value = d.get("setcode", 0)
-        if card_setcode_value and card_setcode_value in setcode_map:
-            card_setcodes.append((card_id, card_setcode_value))
-
-    # Bulk insert all buffered data.
-    log.info(f"Inserting {len(cards_to_insert)} cards and their relations...")
-    db.executemany(
-        "INSERT OR REPLACE INTO Cards VALUES (?,?,?,?,?,?,?,?,?,?)", cards_to_insert
-    )
-    db.executemany("INSERT OR IGNORE INTO CardToRace VALUES (?,?)", card_races)
-    db.executemany("INSERT OR IGNORE INTO CardToAttribute VALUES (?,?)", card_attrs)
-    db.executemany("INSERT OR IGNORE INTO CardToType VALUES (?,?)", card_types)
-    db.executemany("INSERT OR IGNORE INTO CardToSetcode VALUES (?,?)", card_setcodes)
+    # Final flush for the tail batch.
+    _flush_buffers()
+    log.info(f"Inserted {total_cards} cards and their relations.")
     log.info("Card data processing complete.")
 
 
@@ -247,19 +472,22 @@ def process_decks(
     2.  Iterates through every `.json` file in the directory. For each file:
         a. Reads and parses the deck's JSON data.
         b. Extracts the deck's YDK string (a standard deck format).
-        c. Performs a stateful parse of the YDK string, keeping track of the
-           current section (`#main`, `#extra`, `!side`) to collect card IDs.
-        d. For each card ID found, it resolves its alias and validates its existence
-           in `valid_card_ids`. If any card is invalid, the entire deck is discarded.
-        e. If the deck is valid, it uses regex to parse cosmetic data (case, protector)
-           from special comment lines in the YDK string.
-        f. It uses the first 3 cards from the main deck as a reasonable approximation
+        c. Tokenizes the YDK string in a single compiled-regex pass that
+           recognizes card ID lines, section markers (`#extra`, `!side`),
+           and cosmetic markers (case, protector) together, instead of
+           walking the string several times.
+        d. Aliases are resolved per section, then the whole deck is
+           validated against `valid_card_ids` with one set-containment
+           check. If any card is invalid, the entire deck is discarded.
+        e. It uses the first 3 cards from the main deck as a reasonable approximation
            for the deck's cover cards.
-        g. It adds the full deck metadata (including cosmetics) to the `decks_to_insert` buffer.
-        h. It uses `collections.Counter` to efficiently count card occurrences
-           for insertion into the `DeckCards` link table.
-    3.  After processing all deck files, it performs two large `executemany` calls
-        to insert all valid decks and their card lists into the database.
+        f. It adds the full deck metadata (including cosmetics) to the `decks_to_insert` buffer.
+        g. Card occurrences are tallied into a plain dict per section for
+           insertion into the `DeckCards` link table.
+    3.  The accumulated decks and card lists are flushed to the database in
+        `executemany` batches every `_DECK_FLUSH_THRESHOLD` decks (plus a
+        final tail flush), so memory stays bounded however large the
+        directory is and the first rows land early.
 
     Args:
         - db (DatabaseConnector): An active database connector.
@@ -275,89 +503,85 @@ def process_decks(
 
     log.info("Scanning and processing deck files...", directory=DECK_DIR)
     decks_to_insert, deck_cards_to_insert = [], []
-    total_files, successful_decks = 0, 0
-
-    for filename in os.listdir(DECK_DIR):
-        if not filename.endswith(".json"):
+    successful_decks = 0
+
+    # A frozenset guards against accidental mutation over thousands of
+    # membership tests and lets each deck be validated with one C-level
+    # subset check instead of per-block Python dispatch.
+    valid_card_ids = frozenset(valid_card_ids)
+
+    def _flush_decks():
+        # Decks carry 14 columns and DeckCards 4; bulk_insert sizes the
+        # multi-row VALUES statements to stay within the bind limit.
+        db.bulk_insert("INSERT OR REPLACE INTO Decks", 14, decks_to_insert)
+        db.bulk_insert("INSERT OR REPLACE INTO DeckCards", 4, deck_cards_to_insert)
+        decks_to_insert.clear()
+        deck_cards_to_insert.clear()
+
+    # scandir returns DirEntry objects with the type info and full path
+    # cached, so filtering tens of thousands of files costs no extra stat
+    # syscall or path join per entry.
+    with os.scandir(DECK_DIR) as entries:
+        deck_paths = [
+            entry.path
+            for entry in entries
+            if entry.name.endswith(".json") and entry.is_file()
+        ]
+    total_files = len(deck_paths)
+
+    # Reading thousands of tiny deck files serially is bound by disk latency,
+    # not CPU. CPython releases the GIL around file I/O, so a thread pool
+    # overlaps those waits while JSON parsing and insert bookkeeping stay on
+    # the main thread. `_iter_deck_payloads` yields in path order with only a
+    # bounded window of reads in flight, so results are deterministic and
+    # memory use stays proportional to the pool size rather than the
+    # directory size.
+    # Skip reasons are tallied and logged once at the end: a corrupted
+    # corpus can otherwise fire thousands of warnings, and every structlog
+    # call pays for its processor chain (timestamping, context copy,
+    # rendering) synchronously inside the hot loop. Per-file detail stays
+    # available at debug level.
+    unreadable_files = invalid_json_files = missing_id_files = invalid_decks = 0
+
+    for filepath, raw in _iter_deck_payloads(deck_paths):
+        if raw is None:
+            unreadable_files += 1
             continue
-
-        total_files += 1
-        filepath = os.path.join(DECK_DIR, filename)
         try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError, IOError) as e:
-            log.warning(
+            data = _json_loads(raw)
+        except (ValueError, UnicodeDecodeError) as e:
+            log.debug(
                 "Skipping invalid or unreadable deck file.", file=filepath, error=str(e)
             )
+            invalid_json_files += 1
             continue
 
         deck_id, deck_name = data.get("deckId"), data.get("deckName", "Unknown Name")
         if not deck_id:
-            log.warning("Skipping deck file with no deckId.", file=filepath)
+            log.debug("Skipping deck file with no deckId.", file=filepath)
+            missing_id_files += 1
             continue
 
-        is_deck_valid = True
-        resolved_cards: Dict[str, List[int]] = {"main": [], "extra": [], "side": []}
         ydk_str = data.get("deckYdk", "")
-        current_section: List[int] | None = None
-        main_deck_cards_for_cover = []
 
         # --- YDK Parsing for Card IDs ---
-        for line in ydk_str.splitlines():
-            line = line.strip()
-            if not line:
-                continue
-
-            # State machine for parsing YDK sections.
-            if line.startswith("#main"):
-                current_section = resolved_cards["main"]
-                continue
-            if line.startswith("#extra"):
-                current_section = resolved_cards["extra"]
-                continue
-            if line.startswith("!side"):
-                current_section = resolved_cards["side"]
-                continue
-            if line.startswith("#") or current_section is None:
-                continue
-
-            try:
-                card_id = int(line)
-                # Validation Step: Resolve alias, then check for existence.
-                original_id = alias_map.get(card_id, card_id)
-                if original_id in valid_card_ids:
-                    current_section.append(original_id)
-                    # Also collect main deck cards to determine cover cards later.
-                    if current_section is resolved_cards["main"]:
-                        main_deck_cards_for_cover.append(original_id)
-                else:
-                    log.warning(
-                        "Deck contains an invalid card ID. Discarding deck.",
-                        deck_name=deck_name,
-                        deck_id=deck_id,
-                        invalid_id=card_id,
-                    )
-                    is_deck_valid = False
-                    break  # Stop processing this deck immediately.
-            except ValueError:
-                log.warning(
-                    "Skipping non-integer line in YDK section.",
-                    line=line,
-                    deck_id=deck_id,
-                )
+        resolved_cards, invalid_id, deck_case, deck_protector = _parse_deck_ydk(
+            ydk_str, valid_card_ids, alias_map
+        )
+        is_deck_valid = invalid_id is None
+        if not is_deck_valid:
+            log.debug(
+                "Deck contains an invalid card ID. Discarding deck.",
+                deck_name=deck_name,
+                deck_id=deck_id,
+                invalid_id=invalid_id,
+            )
+            invalid_decks += 1
+        main_deck_cards_for_cover = resolved_cards.get("main", [])
 
         if is_deck_valid and len(resolved_cards["main"]) > 5 :
             successful_decks += 1
 
-            # --- Parse cosmetic and cover data from the YDK string ---
-            deck_case_match = re.search(r"#case\s*(\d+)", ydk_str)
-            deck_protector_match = re.search(r"#protector\s*(\d+)", ydk_str)
-            deck_case = int(deck_case_match.group(1)) if deck_case_match else 0
-            deck_protector = (
-                int(deck_protector_match.group(1)) if deck_protector_match else 0
-            )
-
             # Use the first 3 cards of the main deck as cover cards, a reasonable approximation.
             covers = main_deck_cards_for_cover[:3]
             deck_cover1 = covers[0] if len(covers) > 0 else 0
@@ -382,25 +606,35 @@ def process_decks(
                     deck_cover3,
                 )
             )
-            # Use Counter to efficiently aggregate card counts (e.g., 3x Ash Blossom).
+            # Aggregate card counts (e.g., 3x Ash Blossom) with a plain dict:
+            # for blocks of at most ~60 IDs this beats Counter, which pays
+            # for its class machinery on every construction — a small win,
+            # but one multiplied across thousands of decks.
             for card_type, id_list in resolved_cards.items():
-                for card_id, count in Counter(id_list).items():
+                counts: Dict[int, int] = {}
+                for card_id in id_list:
+                    counts[card_id] = counts.get(card_id, 0) + 1
+                for card_id, count in counts.items():
                     deck_cards_to_insert.append((deck_id, card_id, card_type, count))
 
+            if len(decks_to_insert) >= _DECK_FLUSH_THRESHOLD:
+                _flush_decks()
+
+    # Tail flush for the last partial batch.
+    _flush_decks()
+
+    if unreadable_files or invalid_json_files or missing_id_files or invalid_decks:
+        log.warning(
+            "Some deck files were skipped; re-run at debug level for details.",
+            unreadable_files=unreadable_files,
+            invalid_json_files=invalid_json_files,
+            missing_id_files=missing_id_files,
+            invalid_card_decks=invalid_decks,
+        )
     log.info(
         "Deck processing stats",
         total_files=total_files,
         successful_decks=successful_decks,
         skipped_decks=total_files - successful_decks,
     )
-
-    log.info(f"Inserting {len(decks_to_insert)} decks and their card lists...")
-    # The INSERT statement now has 14 placeholders for the 14 columns.
-    db.executemany(
-        "INSERT OR REPLACE INTO Decks VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
-        decks_to_insert,
-    )
-    db.executemany(
-        "INSERT OR REPLACE INTO DeckCards VALUES (?,?,?,?)", deck_cards_to_insert
-    )
     log.info("Deck data insertion complete.")
@@ -8,9 +8,10 @@ and `strings.conf`) and transforming them into structured Python objects
 is tailored to the specific format of the file it processes.
 """
 
+import pickle
 import re
 import sqlite3
-from typing import Tuple, Dict, List
+from typing import Any, Optional, Tuple, Dict, List
 import os
 import structlog
 
@@ -18,6 +19,40 @@ from config import LOCAL_CONSTANTS_FILE, LOCAL_SETCODES_FILE, LOCAL_ALIAS_DB_FIL
 
 log = structlog.get_logger(__name__)
 
+# A `!setname <hex code> <cn name> [jp name]` line in strings.conf. The
+# multiline flag lets one C-level scan of the whole file replace the
+# per-line startswith/split loop; the optional third group captures the
+# rest of the line so Japanese names containing spaces survive intact.
+_SETNAME_RE = re.compile(r"(?m)^!setname\s+(\S+)[ \t]+(\S+)(?:[ \t]+(\S[^\r\n]*))?")
+
+
+def _load_parse_cache(source_path: str) -> Optional[Any]:
+    """
+    Returns the pickled parse result for `source_path`, or None if stale.
+
+    The cache sits next to the source file with a `.pkl` suffix and is valid
+    as long as it is at least as new as the source. Builds are re-run
+    constantly during development, and re-parsing an unchanged file is pure
+    wasted regex work.
+    """
+    cache_path = f"{source_path}.pkl"
+    try:
+        if os.path.getmtime(cache_path) >= os.path.getmtime(source_path):
+            with open(cache_path, "rb") as f:
+                return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
+    return None
+
+
+def _save_parse_cache(source_path: str, result: Any):
+    """Pickles a parse result beside its source file; failure is non-fatal."""
+    try:
+        with open(f"{source_path}.pkl", "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except (OSError, pickle.PicklingError) as e:
+        log.warning("Failed to write parse cache.", source=source_path, error=str(e))
+
 
 def parse_local_constants() -> Tuple[Dict[int, str], Dict[int, str], Dict[int, str]]:
     """
@@ -54,6 +89,11 @@ def parse_local_constants() -> Tuple[Dict[int, str], Dict[int, str], Dict[int, s
           Example `race_map`: `{1: 'Warrior', 2: 'Spellcaster', ...}`.
           The dictionaries will contain approximately 25-30 items each.
     """
+    cached = _load_parse_cache(LOCAL_CONSTANTS_FILE)
+    if cached is not None:
+        log.info("Loaded constants from parse cache.", file=LOCAL_CONSTANTS_FILE)
+        return cached
+
     log.info("Parsing local constants file...", file=LOCAL_CONSTANTS_FILE)
     maps: Dict[str, Dict[int, str]] = {"RACE": {}, "ATTRIBUTE": {}, "TYPE": {}}
     try:
@@ -76,7 +116,9 @@ def parse_local_constants() -> Tuple[Dict[int, str], Dict[int, str], Dict[int, s
             maps[map_key][int(hex_val, 16)] = name.strip()
 
     log.info("Finished parsing constants.", counts={k: len(v) for k, v in maps.items()})
-    return maps["RACE"], maps["ATTRIBUTE"], maps["TYPE"]
+    result = (maps["RACE"], maps["ATTRIBUTE"], maps["TYPE"])
+    _save_parse_cache(LOCAL_CONSTANTS_FILE, result)
+    return result
 
 
 def load_alias_map() -> Dict[int, int]:
@@ -114,8 +156,9 @@ def load_alias_map() -> Dict[int, int]:
         conn = sqlite3.connect(f"file:{LOCAL_ALIAS_DB_FILE}?mode=ro", uri=True)
         cursor = conn.cursor()
         cursor.execute("SELECT id, alias FROM datas WHERE alias != 0")
-        # Creates a dict of {alias_id: original_id}.
-        alias_map = {row[0]: row[1] for row in cursor.fetchall()}
+        # Cursors iterate (id, alias) pairs, which is exactly what dict()
+        # consumes — no intermediate fetchall list, rows stream straight in.
+        alias_map = dict(cursor)
         conn.close()
     except sqlite3.Error as e:
         log.error(
@@ -136,10 +179,12 @@ def parse_setcodes() -> Tuple[Dict[int, str], List[Tuple]]:
     This function extracts this information into two useful data structures.
 
     Workflow:
-    1.  Reads the `strings.conf` file line by line.
-    2.  If a line starts with `!setname`, it splits the line into parts.
-    3.  It expects at least 3 parts: `!setname`, hex code, and Chinese name.
-        A fourth part (Japanese name) is optional.
+    1.  Reads the `strings.conf` file in one go.
+    2.  Extracts every `!setname` line with a single compiled multiline
+        regex scan, which runs in the C regex engine instead of a Python
+        loop over tens of thousands of lines.
+    3.  Each match yields the hex code, the Chinese name, and an optional
+        Japanese name.
     4.  It parses the hex code into an integer.
     5.  It populates two data structures simultaneously:
         a. `setcode_map`: A dictionary for fast lookups (`{code: name}`).
@@ -156,28 +201,34 @@ def parse_setcodes() -> Tuple[Dict[int, str], List[Tuple]]:
           2. `setcodes_to_insert` (List[Tuple]): Formatted for `executemany`.
              Example: `[(12305, 'Blue-Eyes', '青眼')]`.
     """
+    cached = _load_parse_cache(LOCAL_SETCODES_FILE)
+    if cached is not None:
+        log.info("Loaded setcodes from parse cache.", file=LOCAL_SETCODES_FILE)
+        return cached
+
     log.info("Parsing setcodes file...", file=LOCAL_SETCODES_FILE)
     setcode_map: Dict[int, str] = {}
     setcodes_to_insert: List[Tuple] = []
     try:
         with open(LOCAL_SETCODES_FILE, "r", encoding="utf-8") as f:
-            for line in f:
-                if line.startswith("!setname"):
-                    parts = line.strip().split(maxsplit=3)
-                    if len(parts) >= 3:
-                        try:
-                            code = int(parts[1], 16)
-                            name_cn = parts[2]
-                            name_jp = parts[3] if len(parts) > 3 else None
-                            setcodes_to_insert.append((code, name_cn, name_jp))
-                            setcode_map[code] = name_cn
-                        except (ValueError, IndexError):
-                            log.warning(
-                                "Skipping malformed setname line.", line=line.strip()
-                            )
-                            continue
+            content = f.read()
+        for match in _SETNAME_RE.finditer(content):
+            hex_code, name_cn, name_jp = match.groups()
+            try:
+                code = int(hex_code, 16)
+            except ValueError:
+                log.warning(
+                    "Skipping malformed setname line.", line=match.group(0).strip()
+                )
+                continue
+            setcodes_to_insert.append(
+                (code, name_cn, name_jp.rstrip() if name_jp else None)
+            )
+            setcode_map[code] = name_cn
     except (IOError, FileNotFoundError) as e:
         log.error("Failed to read setcodes file.", error=str(e))
+        return setcode_map, setcodes_to_insert
 
     log.info(f"Parsed {len(setcode_map)} setcodes.")
+    _save_parse_cache(LOCAL_SETCODES_FILE, (setcode_map, setcodes_to_insert))
     return setcode_map, setcodes_to_insert
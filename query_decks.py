@@ -1,162 +1,328 @@
 # -*- coding: utf-8 -*-
+import atexit
+import functools
 import sqlite3
 import os
 import argparse
+import threading
+import time
 from datetime import datetime
 
+# 结果列表的日期展示格式。用 time.strftime + time.localtime 直接格式化，
+# 避免每行都构造一个 datetime 对象再调用其 strftime。
+_FMT = '%Y-%m-%d %H:%M'
+
+
+def _ymd_to_ms(s):
+    """argparse 的 type 回调：把 YYYY-MM-DD 解析成毫秒时间戳。
+
+    在参数解析阶段完成转换，查询构建时直接使用数值；格式错误也会
+    由 argparse 统一报错，而不是在构建 SQL 时抛出异常。
+    """
+    try:
+        return int(datetime.strptime(s, "%Y-%m-%d").timestamp() * 1000)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日期格式错误: {s!r} (应为 YYYY-MM-DD)")
+
 # --- 请修改为您的数据库文件路径 ---
 DB_FILE = '/home/hp/Projects/OpenSource/MDDecks/yugioh_decks.db'
 
 
-def build_dynamic_query(args):
+# --- EXISTS 子查询模板 ---
+# 每个“卡组包含满足条件的卡片”谓词都用一个独立的相关 EXISTS 子查询表达。
+# 相比为每个过滤器追加一对 JOIN 别名（k 个过滤器会产生 DeckCards 的
+# k 路自连接，中间结果呈指数膨胀，最后还要靠 DISTINCT 去重），
+# EXISTS 让查询规划器对每个谓词独立地做一次小范围的索引查找。
+_NAME_EXISTS = (
+    "EXISTS (SELECT 1 FROM DeckCards DC JOIN Cards C ON DC.card_id = C.id"
+    " WHERE DC.deck_id = D.deck_id AND C.{column} LIKE ?)"
+)
+_LOOKUP_EXISTS = (
+    "EXISTS (SELECT 1 FROM DeckCards DC"
+    " JOIN {link_table} LT ON DC.card_id = LT.card_id"
+    " JOIN {lookup_table} L ON LT.{code_column} = L.{code_column}"
+    " WHERE DC.deck_id = D.deck_id AND L.{name_column} {operator} ?)"
+)
+
+# 各查找表过滤器的模板参数，按 (链接表, 查找表, 代码列, 名称列, 操作符) 排列。
+_LOOKUP_TABLES = {
+    "type": ("CardToType", "CardTypes", "type_code", "type_name", "="),
+    "race": ("CardToRace", "Races", "race_code", "race_name", "="),
+    "attribute": ("CardToAttribute", "Attributes", "attribute_code", "attribute_name", "="),
+    # 使用 LIKE 进行模糊匹配，以处理 "文具电子人|非「电子」" 这类情况
+    "setcode": ("CardToSetcode", "Setcodes", "set_code", "set_name_cn", "LIKE"),
+}
+
+# --card 分组约束支持的键。名称键直接落在 Cards 的列上（LIKE 模糊匹配），
+# 查找键复用 _LOOKUP_TABLES 的连接模板；attr 是 attribute 的简写。
+_CARD_NAME_KEYS = {"cn": "cn_name", "en": "en_name", "jp": "jp_name"}
+_CARD_KEY_ALIASES = {"attr": "attribute"}
+
+
+def _parse_card_groups(groups):
     """
-    根据用户输入的参数动态构建SQL查询语句。
+    把 --card 的若干组 键=值 约束解析为 (键元组列表, 参数值列表)。
+
+    同一组里的所有约束都指向同一张卡，因此会被渲染进同一个 EXISTS
+    子查询；不同组之间仍然相互独立。
     """
-    joins, conditions, params = set(), [], []
-    base_query = "SELECT DISTINCT D.* FROM Decks AS D"
+    group_keys, values = [], []
+    for tokens in groups:
+        keys = []
+        for token in tokens:
+            key, sep, value = token.partition("=")
+            key = _CARD_KEY_ALIASES.get(key, key)
+            if not sep or not value or (
+                key not in _CARD_NAME_KEYS and key not in _LOOKUP_TABLES
+            ):
+                raise ValueError(
+                    f"--card 约束格式错误: {token!r} (应为 cn/en/jp/type/race/attr/setcode=值)"
+                )
+            keys.append(key)
+            if key in _CARD_NAME_KEYS or key == "setcode":
+                values.append(f"%{value}%")
+            else:
+                values.append(value)
+        group_keys.append(tuple(keys))
+    return group_keys, values
 
-    # --- 卡组名模糊搜索 ---
-    if args.deck_name:
-        conditions.append("D.deck_name LIKE ?")
-        params.append(f"%{args.deck_name}%")
 
-    # --- 卡片名模糊搜索 ---
-    if args.cn_name:
-        for i, name_part in enumerate(args.cn_name):
-            alias_dc, alias_c = f"DC_cn{i}", f"C_cn{i}"
-            joins.add(f"JOIN DeckCards AS {alias_dc} ON D.deck_id = {alias_dc}.deck_id")
-            joins.add(f"JOIN Cards AS {alias_c} ON {alias_dc}.card_id = {alias_c}.id")
-            conditions.append(f"{alias_c}.cn_name LIKE ?")
-            params.append(f"%{name_part}%")
-
-    if args.en_name:
-        for i, name_part in enumerate(args.en_name):
-            alias_dc, alias_c = f"DC_en{i}", f"C_en{i}"
-            joins.add(f"JOIN DeckCards AS {alias_dc} ON D.deck_id = {alias_dc}.deck_id")
-            joins.add(f"JOIN Cards AS {alias_c} ON {alias_dc}.card_id = {alias_c}.id")
-            conditions.append(f"{alias_c}.en_name LIKE ?")
-            params.append(f"%{name_part}%")
-
-    if args.jp_name:
-        for i, name_part in enumerate(args.jp_name):
-            alias_dc, alias_c = f"DC_jp{i}", f"C_jp{i}"
-            joins.add(f"JOIN DeckCards AS {alias_dc} ON D.deck_id = {alias_dc}.deck_id")
-            joins.add(f"JOIN Cards AS {alias_c} ON {alias_dc}.card_id = {alias_c}.id")
-            conditions.append(f"{alias_c}.jp_name LIKE ?")
-            params.append(f"%{name_part}%")
-
-    # --- 分类和范围过滤器 ---
-    if args.type:
-        for i, type_name in enumerate(args.type):
-            alias_dc, alias_ctt, alias_ct = f"DC_Type{i}", f"CTT{i}", f"CT{i}"
-            joins.add(f"JOIN DeckCards AS {alias_dc} ON D.deck_id = {alias_dc}.deck_id")
-            joins.add(f"JOIN CardToType AS {alias_ctt} ON {alias_dc}.card_id = {alias_ctt}.card_id")
-            joins.add(f"JOIN CardTypes AS {alias_ct} ON {alias_ctt}.type_code = {alias_ct}.type_code")
-            conditions.append(f"{alias_ct}.type_name = ?")
-            params.append(type_name)
-    if args.race:
-        for i, race_name in enumerate(args.race):
-            alias_dc, alias_ctr, alias_r = f"DC_Race{i}", f"CTR{i}", f"R{i}"
-            joins.add(f"JOIN DeckCards AS {alias_dc} ON D.deck_id = {alias_dc}.deck_id")
-            joins.add(f"JOIN CardToRace AS {alias_ctr} ON {alias_dc}.card_id = {alias_ctr}.card_id")
-            joins.add(f"JOIN Races AS {alias_r} ON {alias_ctr}.race_code = {alias_r}.race_code")
-            conditions.append(f"{alias_r}.race_name = ?")
-            params.append(race_name)
-    if args.attribute:
-        for i, attr_name in enumerate(args.attribute):
-            alias_dc, alias_cta, alias_a = f"DC_Attr{i}", f"CTA{i}", f"A{i}"
-            joins.add(f"JOIN DeckCards AS {alias_dc} ON D.deck_id = {alias_dc}.deck_id")
-            joins.add(f"JOIN CardToAttribute AS {alias_cta} ON {alias_dc}.card_id = {alias_cta}.card_id")
-            joins.add(f"JOIN Attributes AS {alias_a} ON {alias_cta}.attribute_code = {alias_a}.attribute_code")
-            conditions.append(f"{alias_a}.attribute_name = ?")
-            params.append(attr_name)
-
-    # ===================================================================
-    #
-    #   【新增功能】按 Setcode (系列/字段) 查询
-    #
-    # ===================================================================
-    if args.setcode:
-        for i, setcode_name in enumerate(args.setcode):
-            alias_dc, alias_cts, alias_s = f"DC_Setcode{i}", f"CTS{i}", f"S{i}"
-            joins.add(f"JOIN DeckCards AS {alias_dc} ON D.deck_id = {alias_dc}.deck_id")
-            joins.add(f"JOIN CardToSetcode AS {alias_cts} ON {alias_dc}.card_id = {alias_cts}.card_id")
-            joins.add(f"JOIN Setcodes AS {alias_s} ON {alias_cts}.set_code = {alias_s}.set_code")
-            # 使用 LIKE 进行模糊匹配，以处理 "文具电子人|非「电子」" 这类情况
-            conditions.append(f"{alias_s}.set_name_cn LIKE ?")
-            params.append(f"%{setcode_name}%")
+def _render_card_group(keys):
+    """为一组指向同一张卡的约束渲染单个 EXISTS 子查询。"""
+    join_clauses, predicates = [], []
+    for index, key in enumerate(keys):
+        if key in _CARD_NAME_KEYS:
+            predicates.append(f"C.{_CARD_NAME_KEYS[key]} LIKE ?")
+        else:
+            link_table, lookup_table, code_column, name_column, operator = (
+                _LOOKUP_TABLES[key]
+            )
+            link_alias, lookup_alias = f"LT{index}", f"L{index}"
+            join_clauses.append(
+                f" JOIN {link_table} {link_alias} ON C.id = {link_alias}.card_id"
+                f" JOIN {lookup_table} {lookup_alias}"
+                f" ON {link_alias}.{code_column} = {lookup_alias}.{code_column}"
+            )
+            predicates.append(f"{lookup_alias}.{name_column} {operator} ?")
+    return (
+        "EXISTS (SELECT 1 FROM DeckCards DC JOIN Cards C ON DC.card_id = C.id"
+        + "".join(join_clauses)
+        + " WHERE DC.deck_id = D.deck_id AND "
+        + " AND ".join(predicates)
+        + ")"
+    )
 
 
-    if args.likes_ge is not None:
+@functools.lru_cache(maxsize=256)
+def _render_query(shape):
+    """
+    根据查询“形状”（各过滤器的有无和数量）渲染SQL文本。
+
+    交互式使用时同一组参数往往只换字面值不换结构，因此按形状缓存：
+    既省掉重复的字符串拼接，更重要的是让 SQL 文本逐字节稳定，
+    命中 sqlite3 连接内部的预编译语句缓存，免去重新解析和规划。
+
+    条件按固定顺序追加（卡组名 → 各语言卡名 → 各查找表 → --card 分组 → 范围过滤），
+    这本身就保证了 SQL 文本的确定性，无需对条件排序。
+    """
+    (has_deck_name, n_cn, n_en, n_jp, n_type, n_race, n_attr, n_set,
+     card_groups, has_likes_ge, has_likes_le, has_after, has_before,
+     sort_by) = shape
+
+    conditions = []
+    # 所有卡片过滤器都通过 EXISTS 表达，Decks 每行最多输出一次，
+    # 因此不再需要 DISTINCT。
+    if has_deck_name:
+        conditions.append("D.deck_name LIKE ?")
+    for column, count in (("cn_name", n_cn), ("en_name", n_en), ("jp_name", n_jp)):
+        conditions.extend([_NAME_EXISTS.format(column=column)] * count)
+    for key, count in (
+        ("type", n_type), ("race", n_race), ("attribute", n_attr), ("setcode", n_set)
+    ):
+        link_table, lookup_table, code_column, name_column, operator = _LOOKUP_TABLES[key]
+        conditions.extend(
+            [
+                _LOOKUP_EXISTS.format(
+                    link_table=link_table, lookup_table=lookup_table,
+                    code_column=code_column, name_column=name_column,
+                    operator=operator,
+                )
+            ]
+            * count
+        )
+    for keys in card_groups:
+        conditions.append(_render_card_group(keys))
+    if has_likes_ge:
         conditions.append("D.deck_like >= ?")
-        params.append(args.likes_ge)
-    if args.likes_le is not None:
+    if has_likes_le:
         conditions.append("D.deck_like <= ?")
-        params.append(args.likes_le)
-    if args.after_date:
-        ts = int(datetime.strptime(args.after_date, "%Y-%m-%d").timestamp() * 1000)
+    if has_after:
         conditions.append("D.upload_date >= ?")
-        params.append(ts)
-    if args.before_date:
-        ts = int(datetime.strptime(args.before_date, "%Y-%m-%d").timestamp() * 1000)
+    if has_before:
         conditions.append("D.upload_date <= ?")
-        params.append(ts)
 
-    # --- 组合最终的查询语句 ---
-    full_query = base_query
-    if joins:
-        full_query += " " + " ".join(sorted(list(joins)))
+    full_query = "SELECT D.* FROM Decks AS D"
     if conditions:
         full_query += " WHERE " + " AND ".join(conditions)
 
     # 排序和数量限制
-    if args.sort_by == 'likes':
+    if sort_by == 'likes':
         full_query += " ORDER BY D.deck_like DESC"
-    elif args.sort_by == 'date':
+    elif sort_by == 'date':
         full_query += " ORDER BY D.update_date DESC"
     full_query += " LIMIT ?"
+    return full_query
+
+
+def build_dynamic_query(args):
+    """
+    根据用户输入的参数动态构建SQL查询语句。
+
+    SQL 文本由 `_render_query` 按查询形状缓存生成；本函数只负责
+    按与条件完全一致的顺序组装参数列表。
+    """
+    card_group_keys, card_group_values = _parse_card_groups(args.card or ())
+
+    shape = (
+        bool(args.deck_name),
+        len(args.cn_name or ()), len(args.en_name or ()), len(args.jp_name or ()),
+        len(args.type or ()), len(args.race or ()),
+        len(args.attribute or ()), len(args.setcode or ()),
+        tuple(card_group_keys),
+        args.likes_ge is not None, args.likes_le is not None,
+        args.after_date is not None, args.before_date is not None,
+        args.sort_by,
+    )
+
+    params = []
+    if args.deck_name:
+        params.append(f"%{args.deck_name}%")
+    for name_parts in (args.cn_name, args.en_name, args.jp_name):
+        params.extend(f"%{name_part}%" for name_part in name_parts or ())
+    params.extend(args.type or ())
+    params.extend(args.race or ())
+    params.extend(args.attribute or ())
+    params.extend(f"%{setcode_name}%" for setcode_name in args.setcode or ())
+    params.extend(card_group_values)
+    if args.likes_ge is not None:
+        params.append(args.likes_ge)
+    if args.likes_le is not None:
+        params.append(args.likes_le)
+    if args.after_date is not None:
+        params.append(args.after_date)
+    if args.before_date is not None:
+        params.append(args.before_date)
     params.append(args.limit)
 
-    return full_query, params
+    return _render_query(shape), params
+
+
+# 动态查询依赖的索引。较新版本的 SQLite 不再为低选择性的连接列
+# 自动建临时索引，缺了这些索引，EXISTS 子查询和 ORDER BY 都会退化
+# 成全表扫描。CREATE INDEX IF NOT EXISTS 是幂等的，已建好时开销极小。
+_QUERY_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_deckcards_deck ON DeckCards(deck_id, card_id)",
+    "CREATE INDEX IF NOT EXISTS idx_deckcards_card ON DeckCards(card_id, deck_id)",
+    "CREATE INDEX IF NOT EXISTS idx_c2type_card ON CardToType(card_id, type_code)",
+    "CREATE INDEX IF NOT EXISTS idx_c2race_card ON CardToRace(card_id, race_code)",
+    "CREATE INDEX IF NOT EXISTS idx_c2attr_card ON CardToAttribute(card_id, attribute_code)",
+    "CREATE INDEX IF NOT EXISTS idx_c2set_card ON CardToSetcode(card_id, set_code)",
+    "CREATE INDEX IF NOT EXISTS idx_cards_cn ON Cards(cn_name)",
+    "CREATE INDEX IF NOT EXISTS idx_cards_en ON Cards(en_name)",
+    "CREATE INDEX IF NOT EXISTS idx_cards_jp ON Cards(jp_name)",
+    "CREATE INDEX IF NOT EXISTS idx_decks_like ON Decks(deck_like DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_decks_update_date ON Decks(update_date DESC)",
+)
+
+_indexes_ensured = False
+
+
+def ensure_indexes(conn):
+    """为查询涉及的连接列补建索引，每个进程只执行一次。"""
+    global _indexes_ensured
+    if _indexes_ensured:
+        return
+    for statement in _QUERY_INDEXES:
+        conn.execute(statement)
+    conn.commit()
+    _indexes_ensured = True
+
+
+# 进程级共享连接：每次查询都重新 connect/close 要重复付出打开
+# db/-wal/-shm 文件、解析 WAL 头、页缓存冷启动的成本。连接在首次
+# 查询时惰性建立，应用一次 PRAGMA 并补建索引，之后一直复用，
+# 进程退出时由 atexit 关闭。
+_conn = None
+_conn_lock = threading.Lock()
+
+
+def _get_connection():
+    global _conn
+    with _conn_lock:
+        if _conn is None:
+            conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            for pragma in (
+                "journal_mode=WAL",
+                "synchronous=NORMAL",
+                "temp_store=MEMORY",
+                "cache_size=-64000",
+                "mmap_size=268435456",
+            ):
+                conn.execute(f"PRAGMA {pragma}")
+            ensure_indexes(conn)
+            atexit.register(conn.close)
+            _conn = conn
+    return _conn
+
+
+def _iter_cursor(cursor):
+    """按 arraysize 大小的批次从游标取行并逐行产出。"""
+    while True:
+        rows = cursor.fetchmany()
+        if not rows:
+            return
+        yield from rows
 
 
 def execute_query(sql, params):
+    """
+    执行查询并返回按需产出行的迭代器。
+
+    不再 fetchall() 一次性物化所有行：deck_ydk 字段可能很大，
+    流式迭代让峰值内存与 LIMIT 无关，首行输出也更快。行按
+    fetchmany 批次（每批 128 行）取出，比逐行 fetchone 少付
+    Python 层的调用开销，峰值内存仍只有一个批次。
+    """
     if not os.path.exists(DB_FILE):
         print(f"错误: 数据库文件 '{DB_FILE}' 不存在。")
         return None
     try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        cursor = _get_connection().cursor()
+        cursor.arraysize = 128
         cursor.execute(sql, params)
-        return cursor.fetchall()
+        return _iter_cursor(cursor)
     except sqlite3.Error as e:
         print(f"数据库查询时发生错误: {e}")
         return None
-    finally:
-        if conn:
-            conn.close()
 
 
 def print_results(decks, args):
     if decks is None:
         return
-    if not decks:
-        print("未找到满足所有条件的卡组。")
-        return
-
-    print(f"--- 找到 {len(decks)} 个匹配的卡组 (按 {args.sort_by} 排序) ---")
 
-    for i, deck in enumerate(decks):
+    count = 0
+    for i, deck in enumerate(decks, 1):
+        count = i
         print("\n" + "=" * 60)
         update_date_str = "未知日期"
         if deck['update_date']:
             try:
-                update_date_str = datetime.fromtimestamp(deck['update_date'] / 1000).strftime('%Y-%m-%d %H:%M')
-            except (TypeError, ValueError):
+                update_date_str = time.strftime(_FMT, time.localtime(deck['update_date'] / 1000))
+            except (TypeError, ValueError, OSError):
                 pass
 
-        print(f"#{i + 1:02d} | 卡组名: {deck['deck_name']}")
+        print(f"#{i:02d} | 卡组名: {deck['deck_name']}")
         print(f"    | 点赞: {deck['deck_like']:<5} | 最后更新: {update_date_str}")
         print(f"    | Deck ID: {deck['deck_id']}")
 
@@ -165,7 +331,13 @@ def print_results(decks, args):
             print(deck['deck_ydk'].strip())
             print("----------------------")
 
+    if not count:
+        print("未找到满足所有条件的卡组。")
+        return
+
+    # 行是流式产出的，总数只有在迭代结束后才知道，因此汇总放在末尾
     print("\n" + "=" * 60)
+    print(f"--- 共找到 {count} 个匹配的卡组 (按 {args.sort_by} 排序) ---")
 
 
 if __name__ == "__main__":
@@ -182,10 +354,13 @@ if __name__ == "__main__":
     parser.add_argument('--type', nargs='+', help='筛选包含指定类型卡片的卡组 (例如: --type 融合 效果)。')
     parser.add_argument('--race', nargs='+', help='筛选包含指定种族卡片的卡组 (例如: --race 龙族 魔法师族)。')
     parser.add_argument('--attribute', nargs='+', help='筛选包含指定属性卡片的卡组 (例如: --attribute 光 暗)。')
+    parser.add_argument('--card', nargs='+', action='append', metavar='键=值',
+                        help='按一组约束查找同一张卡 (例如: --card cn=青眼 type=融合 attr=光)。\n'
+                             '可多次使用, 每次 --card 描述一张卡; 支持的键: cn/en/jp/type/race/attr/setcode。')
     parser.add_argument('--likes-ge', type=int, help='筛选点赞数大于或等于 N 的卡组。')
     parser.add_argument('--likes-le', type=int, help='筛选点赞数小于或等于 N 的卡组。')
-    parser.add_argument('--after-date', type=str, help='筛选指定日期后上传的卡组 (格式: YYYY-MM-DD)。')
-    parser.add_argument('--before-date', type=str, help='筛选指定日期前上传的卡组 (格式: YYYY-MM-DD)。')
+    parser.add_argument('--after-date', type=_ymd_to_ms, help='筛选指定日期后上传的卡组 (格式: YYYY-MM-DD)。')
+    parser.add_argument('--before-date', type=_ymd_to_ms, help='筛选指定日期前上传的卡组 (格式: YYYY-MM-DD)。')
     parser.add_argument('--sort-by', choices=['likes', 'date'], default='likes', help='排序方式 (默认: likes)。')
     parser.add_argument('-n', '--limit', type=int, default=10, help='返回结果的数量 (默认: 10)。')
     args = parser.parse_args()
@@ -195,7 +370,10 @@ if __name__ == "__main__":
     if not any(v for v in arg_dict.values() if v is not None):
         parser.print_help()
     else:
-        sql_query, params = build_dynamic_query(args)
+        try:
+            sql_query, params = build_dynamic_query(args)
+        except ValueError as e:
+            parser.error(str(e))
         print("\n[SQL] 正在执行查询...")
         # print(f"    > Query: {sql_query}")  # 取消此行注释可打印完整SQL语句
         # print(f"    > Params: {params}")   # 取消此行注释可打印查询参数